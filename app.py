@@ -1,9 +1,11 @@
 import streamlit as st
 from main_functions import Oriana
+from crawler import Crawler, BACKGROUND_CRAWL
 import time
 import logging
 import base64
 import os
+from datetime import datetime
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +17,14 @@ def get_oriana_instance():
 # Use this function to get the Oriana instance
 oriana = get_oriana_instance()
 
+# One background crawler per server process, sharing the app's Oriana instance
+@st.cache_resource
+def start_crawler():
+    return Crawler(get_oriana_instance()).start()
+
+if BACKGROUND_CRAWL:
+    start_crawler()
+
 # Function to load and encode the image
 def get_base64_of_bin_file(bin_file):
     with open(bin_file, 'rb') as f:
@@ -95,9 +105,18 @@ for source in oriana.sources:
                 st.sidebar.error(f"Error removing source: {str(e)}")
                 logging.error(f"Error removing source {source}: {str(e)}")
 
+if st.sidebar.button("Check Sources for New Articles"):
+    with st.spinner("Checking feeds..."):
+        crawled = oriana.crawl_sources()
+    for source, entries in crawled.items():
+        st.sidebar.write(f"{source}: {len(entries)} new")
+    st.sidebar.caption("New articles are added to the archive search.")
+
 # Debug info
 if st.sidebar.checkbox("Show Debug Info"):
     st.sidebar.write("Current sources:", oriana.sources)
+    if BACKGROUND_CRAWL:
+        st.sidebar.write("Last background crawl:", start_crawler().last_round)
 
 # About Oriana in sidebar
 st.sidebar.header("About Oriana")
@@ -113,12 +132,80 @@ with st.sidebar.expander("ℹ️ Learn More"):
 # Initialize session state
 if 'selected_answers' not in st.session_state:
     st.session_state.selected_answers = []
+if 'query_results' not in st.session_state:
+    # (source, normalized keywords, content fingerprint) -> answer
+    st.session_state.query_results = {}
+    # (source, normalized keywords) -> fingerprint of the latest answer
+    st.session_state.latest_queries = {}
+if 'all_source_results' not in st.session_state:
+    # normalized keywords -> ranked answers from every source
+    st.session_state.all_source_results = {}
 
 # Function to display transcript counter
 def display_transcript_counter():
     st.write(f"Current number of summaries in transcript: {len(st.session_state.selected_answers)}/5")
     st.write("Add up to 5 article summaries to transcript.")
 
+# Answer reruns from stored results; only a new query or an explicit refresh
+# touches the source, and the LLM only runs again if the content changed.
+def investigate(keywords, source, refresh=False):
+    query = (source, oriana.normalize_keywords(keywords))
+    fingerprint = st.session_state.latest_queries.get(query)
+    if refresh or fingerprint is None:
+        with st.spinner("Investigating..."):
+            fingerprint = oriana.content_fingerprint(source)
+    answer = st.session_state.query_results.get(query + (fingerprint,))
+    if answer is not None:
+        st.write(answer)
+    else:
+        with st.spinner("Investigating..."):
+            answer_stream = oriana.answer_question(keywords, source, stream=True)
+        answer = st.write_stream(answer_stream)
+        if fingerprint is not None and not answer.startswith("Error in investigative_journalist_agent"):
+            st.session_state.query_results[query + (fingerprint,)] = answer
+    st.session_state.latest_queries[query] = fingerprint
+    return answer
+
+# Earlier summaries that read most like this one
+def show_related(summary, url):
+    related = oriana.related_stories(summary, exclude_url=url)
+    if related:
+        with st.expander(f"Related stories ({len(related)})"):
+            for story in related:
+                st.write(f"**[{story['title'] or story['url']}]({story['url']})** | {datetime.fromtimestamp(story['created_at']):%Y-%m-%d}")
+                st.write(story['summary'])
+
+# Summaries and transcripts run as jobs on the server's worker pool. Their IDs
+# live in the URL, so a rerun or a browser refresh finds them again, and the
+# page polls while any of them is still running.
+running_jobs = []
+
+def current_job(name):
+    job_id = st.query_params.get(name)
+    return oriana.job_queue.get(job_id) if job_id else None
+
+def start_job(name, kind, params):
+    st.query_params[name] = oriana.job_queue.submit(kind, params)
+    st.rerun()
+
+def show_job_status(name, job):
+    if job['status'] in ('queued', 'running'):
+        running_jobs.append(job['id'])
+        if job['cancel_requested']:
+            st.info("Cancelling...")
+        else:
+            if job['total']:
+                st.progress(job['completed'] / job['total'], text=f"{job['completed']} of {job['total']} done")
+            else:
+                st.caption("Working..." if job['status'] == 'running' else "Waiting for a free worker...")
+            if st.button("Cancel", key=f"cancel_{name}"):
+                oriana.job_queue.cancel(job['id'])
+                st.rerun()
+    elif job['status'] == 'failed':
+        st.error(f"An error occurred: {job['error']}")
+    elif job['status'] == 'cancelled':
+        st.info("Cancelled. Results finished before cancelling are shown below.")
+
 # Section 1: Let Oriana Read and Summarize your Article
 st.markdown("## Let Oriana Read and Summarize your Article")
 st.markdown("---")  # Visual separator
@@ -126,11 +213,33 @@ st.markdown("---")  # Visual separator
 selected_source = st.selectbox("Select source:", oriana.sources)
 
 keywords = st.text_input("Add keywords or phrases about your article (separate multiple entries with commas):")
-if keywords:
-    with st.spinner("Investigating..."):
-        answer = oriana.answer_question(keywords, selected_source)
+investigate_all = st.checkbox("Investigate all sources", help="Search every source at once and summarize the most relevant pages.")
+if keywords and investigate_all:
+    refresh = st.button("Refresh Investigation", key="refresh_all_sources")
+    query = oriana.normalize_keywords(keywords)
+    if refresh or query not in st.session_state.all_source_results:
+        with st.spinner(f"Investigating {len(oriana.sources)} sources..."):
+            st.session_state.all_source_results[query] = oriana.investigate_all_sources(keywords)
+    ranked = st.session_state.all_source_results[query]
+    if not ranked:
+        st.warning(f"No relevant information found in any source using the provided keywords: {keywords}.")
+    for i, result in enumerate(ranked):
+        st.subheader(f"{i + 1}. {result['source']}")
+        st.write(f"**Relevance:** {result['score']:.2f} | **Matches:** {', '.join(f'{term} ({count})' for term, count in result['counts'].items() if count)}")
+        st.write(result['answer'])
+        show_related(result['answer'], result['source'])
+        if st.button("Add to Transcript", key=f"add_ranked_to_transcript_{i}"):
+            if len(st.session_state.selected_answers) < 5:
+                st.session_state.selected_answers.append(f"{result['source']}: {result['answer']}")
+                st.success("Summary added to transcript.")
+                st.rerun()
+            else:
+                st.warning("You've reached the limit of 5 article summaries in the transcript.")
+elif keywords:
+    refresh = st.button("Refresh Investigation", key="refresh_investigation")
     st.subheader("Article Summary")
-    st.write(answer)
+    answer = investigate(keywords, selected_source, refresh)
+    show_related(answer, selected_source)
     
     # Add answer to transcript
     if st.button("Add to Transcript", key="add_summary_to_transcript"):
@@ -148,9 +257,18 @@ display_transcript_counter()
 st.markdown("### Generate Transcript and News Script")
 if st.button("Generate Transcript and News Script"):
     if st.session_state.selected_answers:
-        with st.spinner("Generating transcript and news script..."):
-            transcript = oriana.generate_news_transcript(st.session_state.selected_answers)
-        st.subheader("Generated Transcript and News Script:")
+        start_job('transcript_job', 'transcript', {'answers': st.session_state.selected_answers})
+    else:
+        st.warning("Please add some article summaries to the transcript first.")
+
+transcript_job = current_job('transcript_job')
+if transcript_job:
+    st.subheader("Generated Transcript and News Script:")
+    show_job_status('transcript_job', transcript_job)
+    transcript = transcript_job['result'] or ""
+    if transcript_job['id'] in running_jobs:
+        st.text(transcript)
+    elif transcript:
         st.text_area("Transcript", transcript, height=300)
         st.download_button(
             label="Download Transcript and News Script",
@@ -158,8 +276,6 @@ if st.button("Generate Transcript and News Script"):
             file_name="oriana_transcript_and_script.txt",
             mime="text/plain"
         )
-    else:
-        st.warning("Please add some article summaries to the transcript first.")
 
 # Section 2: Summarize your article(s)
 st.markdown("## Summarize your article(s)")
@@ -168,30 +284,29 @@ st.markdown("---")  # Visual separator
 article_urls = st.text_area("Enter Article/Document URL(s) (one per line, up to 5):")
 
 if st.button("Summarize Articles"):
-    with st.spinner("Summarizing articles..."):
-        try:
-            urls = [url.strip() for url in article_urls.split('\n') if url.strip()][:5]  # Limit to 5 URLs
-            summarized_articles = []
-            for url in urls:
-                article = oriana.get_webpage_articles("", url)  # Empty string as we're not searching for a specific subject
-                if article:
-                    summary = oriana.summarize_articles(article)[0]
-                    summarized_articles.append(summary)
-            
-            if not summarized_articles:
-                st.warning("No articles found. Please check your URLs and try again.")
-            else:
-                st.session_state.summarized_articles = summarized_articles
-                st.rerun()
-        except Exception as e:
-            st.error(f"An error occurred: {str(e)}")
+    urls = [url.strip() for url in article_urls.split('\n') if url.strip()][:5]  # Limit to 5 URLs
+    if urls:
+        # The job fetches and summarizes all URLs concurrently
+        start_job('summary_job', 'summarize_urls', {'urls': urls})
+    else:
+        st.warning("Please enter at least one URL.")
 
-if 'summarized_articles' in st.session_state:
+summary_job = current_job('summary_job')
+summarized_articles = [article for article in (summary_job or {}).get('results') or [] if article]
+if summary_job:
+    show_job_status('summary_job', summary_job)
+    if summary_job['status'] == 'done' and not summarized_articles:
+        st.warning("No articles found. Please check your URLs and try again.")
+
+if summarized_articles:
     st.subheader(f"Summarized Articles")
-    for i, article in enumerate(st.session_state.summarized_articles):
+    for i, article in enumerate(summarized_articles):
         st.write(f"### [{article['title']}]({article['url']})")
         st.write(f"**Published:** {article['published_date']} | **Source:** {article['source']}")
+        if article.get('duplicate_of'):
+            st.caption(f"Same story as {article['duplicate_of']}; its summary was reused.")
         st.write(f"**Summary:** {article['summary']}")
+        show_related(article['summary'], article['url'])
         if st.button(f"Add to Transcript: {article['title'][:30]}...", key=f"add_to_transcript_{i}"):
             if len(st.session_state.selected_answers) < 5:
                 st.session_state.selected_answers.append(f"{article['source']}: {article['summary']}")
@@ -204,7 +319,23 @@ if 'summarized_articles' in st.session_state:
 # Display transcript counter in Section 2
 display_transcript_counter()
 
-# Section 3: Additional Resources
+# Section 3: Search everything Oriana has read
+st.markdown("## Search the Archive")
+st.markdown("---")  # Visual separator
+
+archive_query = st.text_input("Search every page Oriana has read (same keyword syntax as above):")
+if archive_query:
+    archive_results = oriana.search_archive(archive_query)
+    if not archive_results:
+        st.info("Nothing in the archive matches that search yet.")
+    for result in archive_results:
+        st.write(f"### [{result['title'] or result['url']}]({result['url']})")
+        if result['published_date']:
+            st.write(f"**Published:** {result['published_date']}")
+        st.write(result['snippet'])
+        st.write("---")
+
+# Section 4: Additional Resources
 st.markdown("## Additional Resources")
 st.markdown("---")  # Visual separator
 
@@ -236,6 +367,11 @@ for name, url in resources.items():
 
 st.write("Use these resources to find article URLs for summarization.")
 
+# Poll running jobs last, so the whole page has rendered before the rerun
+if running_jobs:
+    time.sleep(1)
+    st.rerun()
+
 # import streamlit as st
 # from main_functions import Oriana
 # import time
@@ -0,0 +1,136 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import http_client
+
+BATCH_PER_DOMAIN = int(os.getenv("ORIANA_BATCH_PER_DOMAIN", 2))
+BATCH_WORKERS = int(os.getenv("ORIANA_BATCH_WORKERS", 8))
+
+
+async def fetch_page(oriana, client, url, slots):
+    host = urlsplit(url).netloc.lower()
+    slot = slots.setdefault(host, asyncio.Semaphore(BATCH_PER_DOMAIN))
+    async with slot:
+        return await oriana.fetch_url_async(url, client)
+
+
+async def extract_articles(oriana, client, url, subject, slots):
+    # Raises if the page can't be fetched; [] if it has no matching article.
+    page = await fetch_page(oriana, client, url, slots)
+    # newspaper3k parsing is CPU-bound, keep it off the event loop.
+    return await asyncio.to_thread(oriana.get_webpage_articles, subject, url, page)
+
+
+async def fetch_articles(oriana, client, url, subject, slots):
+    try:
+        return await extract_articles(oriana, client, url, subject, slots)
+    except Exception as e:
+        print(f"Error processing webpage {url}: {str(e)}")
+        return []
+
+
+async def summarize_urls_async(oriana, urls, subject="", on_summary=None, cancelled=None):
+    # on_summary(index, summary) is called once per URL, with None when
+    # nothing could be summarized. Once cancelled() is true no new summaries start.
+    import httpx
+    results = [None] * len(urls)
+    slots = {}
+    async with httpx.AsyncClient(**http_client.client_options()) as client:
+
+        async def extract(index, url):
+            return index, await fetch_articles(oriana, client, url, subject, slots)
+
+        async def summarize(index, articles):
+            summaries = await asyncio.to_thread(oriana.summarize_articles, articles)
+            if summaries:
+                results[index] = summaries[0]
+            if on_summary:
+                on_summary(index, results[index])
+
+        summarizing = []
+        # Start summarizing each article as soon as its own download finishes.
+        for extraction in asyncio.as_completed([extract(i, url) for i, url in enumerate(urls)]):
+            index, articles = await extraction
+            if cancelled and cancelled():
+                break
+            if articles:
+                summarizing.append(asyncio.create_task(summarize(index, articles)))
+            elif on_summary:
+                on_summary(index, None)
+        await asyncio.gather(*summarizing)
+    return results
+
+
+async def summarize_each_async(oriana, urls, on_result, workers=BATCH_WORKERS, subject=""):
+    # Streaming variant for large batches: urls may be any iterable and at most
+    # `workers` of them are in flight, so memory stays flat however many there
+    # are. on_result(url, summary, error) is called as each one finishes, with
+    # an error for pages that could not be fetched or summarized and neither
+    # for pages without a matching article.
+    import httpx
+    # Extraction and summarizing run in threads; make room for all of them.
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=workers + 4))
+    slots = {}
+    limit = asyncio.Semaphore(workers)
+    pending = set()
+    async with httpx.AsyncClient(**http_client.client_options()) as client:
+
+        async def process(url):
+            try:
+                articles = await extract_articles(oriana, client, url, subject, slots)
+                if not articles:
+                    on_result(url, None, None)
+                    return
+                summaries = await asyncio.to_thread(oriana.summarize_articles, articles)
+                if summaries:
+                    on_result(url, summaries[0], None)
+                else:
+                    on_result(url, None, "Error summarizing article")
+            except Exception as e:
+                on_result(url, None, str(e))
+            finally:
+                limit.release()
+
+        for url in urls:
+            await limit.acquire()
+            task = asyncio.create_task(process(url))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        await asyncio.gather(*pending)
+
+
+def parsed_document(oriana, url, page):
+    # Parsing is CPU-bound and get_document takes a lock; run this in a thread.
+    document = oriana.get_document(url, page)
+    document.text
+    return document
+
+
+async def fetch_documents_async(oriana, urls):
+    import httpx
+    slots = {}
+    async with httpx.AsyncClient(**http_client.client_options()) as client:
+
+        async def document(url):
+            try:
+                page = await fetch_page(oriana, client, url, slots)
+                return await asyncio.to_thread(parsed_document, oriana, url, page)
+            except Exception as e:
+                print(f"Error scraping {url}: {str(e)}")
+                return None
+
+        return await asyncio.gather(*[document(url) for url in urls])
+
+
+def fetch_documents(oriana, urls):
+    return asyncio.run(fetch_documents_async(oriana, urls))
+
+
+def summarize_each(oriana, urls, on_result, workers=BATCH_WORKERS, subject=""):
+    return asyncio.run(summarize_each_async(oriana, urls, on_result, workers, subject))
+
+
+def summarize_urls(oriana, urls, subject="", on_summary=None, cancelled=None):
+    return asyncio.run(summarize_urls_async(oriana, urls, subject, on_summary, cancelled))
@@ -0,0 +1,92 @@
+# Compares the page text extraction backends over the recorded corpus.
+#
+#   python benchmarks/bench_extraction.py [--corpus benchmarks/pages] [--repeat 5]
+#
+# For every backend it reports total extraction time (median of the repeats),
+# peak memory per page (tracemalloc), and how close the text is to the bs4
+# backend's (word-level similarity, 1.0 = identical).
+import argparse
+import difflib
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import corpus
+from extraction import BACKENDS
+from fetch_cache import CachedPage
+
+
+def similarity(a, b):
+    if a == b:
+        return 1.0
+    return difflib.SequenceMatcher(None, a.split(), b.split(), autojunk=False).ratio()
+
+
+def run(pages, repeat):
+    results = {}
+    baseline = {url: BACKENDS['bs4'](html, url)[0] for url, html in pages}
+    for name, backend in BACKENDS.items():
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for url, html in pages:
+                backend(html, url)
+            timings.append(time.perf_counter() - start)
+
+        peaks = []
+        scores = []
+        for url, html in pages:
+            tracemalloc.start()
+            text = backend(html, url)[0]
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            scores.append(similarity(baseline[url], text))
+
+        results[name] = {
+            "seconds": statistics.median(timings),
+            "ms_per_page": statistics.median(timings) / len(pages) * 1000,
+            "peak_kb_mean": statistics.mean(peaks) / 1024,
+            "peak_kb_max": max(peaks) / 1024,
+            "similarity_mean": statistics.mean(scores),
+            "similarity_min": min(scores),
+            "identical_pages": sum(1 for score in scores if score == 1.0),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML extraction backends.")
+    parser.add_argument("--corpus", default=corpus.CORPUS_DIR)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    pages = [
+        (url, CachedPage(url, body, {"content-type": content_type}, 0).text)
+        for url, body, content_type in corpus.load(args.corpus)
+    ]
+    if not pages:
+        sys.exit(f"No pages in {args.corpus}; record some with benchmarks/corpus.py first.")
+
+    results = run(pages, args.repeat)
+    print(f"{len(pages)} pages, {sum(len(html) for _, html in pages) / 1024:.0f} KB of HTML")
+    for name, result in results.items():
+        print(
+            f"{name:5} {result['ms_per_page']:8.2f} ms/page  "
+            f"peak {result['peak_kb_mean']:8.0f} KB (max {result['peak_kb_max']:.0f})  "
+            f"similarity {result['similarity_mean']:.3f} (min {result['similarity_min']:.3f}, "
+            f"{result['identical_pages']}/{len(pages)} identical)"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# End-to-end benchmark of Oriana's pipeline, fully offline.
+#
+#   python benchmarks/bench_pipeline.py [--corpus benchmarks/pages] [--llm-latency 300]
+#                                       [--json run.json] [--compare previous.json]
+#
+# The recorded corpus (see corpus.py) is served by a local HTTP stand-in, and
+# the OpenAI client is pointed at a local stub that answers after
+# --llm-latency ms (streamed answers spread it over their tokens). Every run
+# starts with empty caches in a temporary directory, then times each stage
+# per call:
+#
+#   fetch        fetch_url, cold page cache
+#   scrape       scrape_specific_url, text extraction from the cached page
+#   article      extract_article, newspaper parse from the cached page
+#   search       search_source, keywords taken from each page's title
+#   summarize    summarize_article for every page, through the LLM scheduler
+#   transcript   generate_news_transcript over five summaries, streamed
+#
+# and reports throughput and p50/p95/p99 latency. --json saves the report;
+# --compare prints the change against an earlier one. The LLM rate limits
+# are lifted unless ORIANA_LLM_RPM/ORIANA_LLM_TPM are set, so the numbers
+# measure Oriana rather than the provider budget.
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import corpus
+
+STAGES = ["fetch", "scrape", "article", "search", "summarize", "transcript"]
+STUB_WORDS = ("The stub model read the article carefully and reports that officials announced new measures "
+              "while critics questioned the cost and timing of the plan.").split()
+
+
+def synthetic_pages(count):
+    # Deterministic stand-in articles for when no corpus has been recorded. The
+    # text is drawn at random per page so no two pages are near-duplicates.
+    topics = ["budget", "climate", "election", "transit", "housing", "schools", "health", "energy"]
+    vocabulary = STUB_WORDS + topics + [f"term{i}" for i in range(400)]
+    pages = []
+    for i in range(count):
+        topic = topics[i % len(topics)]
+        words = random.Random(i)
+        paragraphs = "".join(
+            f"<p>{' '.join(words.choice(vocabulary) for _ in range(60)).capitalize()}.</p>"
+            for _ in range(40)
+        )
+        html = (f"<html><head><title>{topic.title()} plan debated ({i})</title></head><body>"
+                f"<header><nav><a href='/'>Home</a></nav></header><article><h1>{topic.title()} plan debated</h1>"
+                f"{paragraphs}</article><footer>Footer</footer></body></html>")
+        pages.append((f"https://example.com/{topic}/{i}", html.encode(), "text/html; charset=utf-8"))
+    return pages
+
+
+def serve(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def page_server(pages, latency):
+    files = {f"/{i}.html": (body, content_type) for i, (_, body, content_type) in enumerate(pages)}
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            time.sleep(latency)
+            if self.path not in files:
+                self.send_error(404)
+                return
+            body, content_type = files[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", f'"{hash(body)}"')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server, base = serve(Handler)
+    return server, [f"{base}/{i}.html" for i in range(len(pages))]
+
+
+def llm_server(latency, words):
+    answer = " ".join(STUB_WORDS[i % len(STUB_WORDS)] for i in range(words))
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            base = {"id": "stub", "created": int(time.time()), "model": request.get("model")}
+            if not request.get("stream"):
+                time.sleep(latency)
+                body = json.dumps({
+                    **base, "object": "chat.completion",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                                 "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": words, "total_tokens": words},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            tokens = answer.split(" ")
+            for token in tokens:
+                time.sleep(latency / len(tokens))
+                chunk = {**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": {"content": token + " "}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+        def log_message(self, *args):
+            pass
+
+    server, base = serve(Handler)
+    return server, f"{base}/v1"
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    # Nearest rank, so p99 of a short run is its slowest call rather than an interpolation.
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize_timings(timings, wall):
+    return {
+        "calls": len(timings),
+        "seconds": wall,
+        "per_second": len(timings) / wall if wall else None,
+        "mean_ms": statistics.mean(timings) * 1000,
+        "p50_ms": percentile(timings, 50) * 1000,
+        "p95_ms": percentile(timings, 95) * 1000,
+        "p99_ms": percentile(timings, 99) * 1000,
+        "max_ms": max(timings) * 1000,
+    }
+
+
+def timed(fn, items):
+    timings = []
+    results = []
+    start = time.perf_counter()
+    for item in items:
+        call = time.perf_counter()
+        results.append(fn(item))
+        timings.append(time.perf_counter() - call)
+    return results, timings, time.perf_counter() - start
+
+
+def run(urls, transcripts):
+    import main_functions
+    from passages import title_query
+    oriana = main_functions.Oriana()
+    report = {}
+
+    _, timings, wall = timed(oriana.fetch_url, urls)
+    report["fetch"] = summarize_timings(timings, wall)
+
+    def fresh(fn):
+        # Drop parsed documents so every call parses again from the page cache.
+        def call(url):
+            oriana.documents.clear()
+            return fn(url)
+        return call
+
+    _, timings, wall = timed(fresh(oriana.scrape_specific_url), urls)
+    report["scrape"] = summarize_timings(timings, wall)
+
+    articles, timings, wall = timed(fresh(oriana.extract_article), urls)
+    report["article"] = summarize_timings(timings, wall)
+
+    queries = {url: title_query(article['title']) or "the" for url, article in zip(urls, articles)}
+    _, timings, wall = timed(lambda url: oriana.search_source(queries[url], url), urls)
+    report["search"] = summarize_timings(timings, wall)
+
+    to_summarize = [{
+        'title': article['title'],
+        'url': url,
+        'content': article['text'],
+        'published_date': article['publish_date'],
+        'source': url,
+    } for url, article in zip(urls, articles)]
+    timings = []
+
+    def summarize(article):
+        call = time.perf_counter()
+        summary = oriana.summarize_article(article)
+        timings.append(time.perf_counter() - call)
+        return summary
+
+    start = time.perf_counter()
+    summaries = [summary for summary in oriana.llm_scheduler.map(summarize, to_summarize) if summary]
+    report["summarize"] = summarize_timings(timings, time.perf_counter() - start)
+
+    answers = [f"{summary['source']}: {summary['summary']}" for summary in summaries[:5]]
+
+    def transcript(_):
+        oriana.llm_cache.clear()
+        return "".join(oriana.generate_news_transcript(answers, stream=True))
+
+    _, timings, wall = timed(transcript, range(transcripts))
+    report["transcript"] = summarize_timings(timings, wall)
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(report, previous):
+    print(f"\nChange against {previous['meta'].get('commit')} ({previous['meta'].get('date')}):")
+    for stage in STAGES:
+        old = previous["stages"].get(stage)
+        new = report["stages"].get(stage)
+        if not old or not new:
+            continue
+        changes = "  ".join(
+            f"{key[:-3]} {(new[key] - old[key]) / old[key] * 100:+6.1f}%" if old[key] else f"{key[:-3]} n/a"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        )
+        print(f"{stage:10} {changes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Oriana end to end against local stand-ins.")
+    parser.add_argument("--corpus", default=corpus.CORPUS_DIR)
+    parser.add_argument("--synthetic", type=int, default=0, help="use N generated pages instead of the corpus")
+    parser.add_argument("--pages", type=int, default=0, help="use at most this many pages")
+    parser.add_argument("--page-latency", type=float, default=20, help="stand-in server delay per page, ms")
+    parser.add_argument("--llm-latency", type=float, default=300, help="stub LLM time per answer, ms")
+    parser.add_argument("--llm-words", type=int, default=120, help="words in each stub answer")
+    parser.add_argument("--transcripts", type=int, default=5, help="transcripts to generate")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="earlier --json report to compare against")
+    args = parser.parse_args()
+
+    pages = synthetic_pages(args.synthetic) if args.synthetic else corpus.load(args.corpus)
+    if args.pages:
+        pages = pages[:args.pages]
+    if not pages:
+        sys.exit(f"No pages in {args.corpus}; record some with benchmarks/corpus.py or pass --synthetic 50.")
+
+    page_stand_in, urls = page_server(pages, args.page_latency / 1000)
+    llm_stub, llm_base = llm_server(args.llm_latency / 1000, args.llm_words)
+    workdir = tempfile.mkdtemp(prefix="oriana-bench-")
+    os.environ.update({
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_API_BASE": llm_base,
+        "ORIANA_CACHE_DIR": os.path.join(workdir, "cache"),
+        "ORIANA_DATA_DIR": os.path.join(workdir, "data"),
+        "ORIANA_STORAGE": "sqlite",
+        "ORIANA_GITHUB_MIRROR": "0",
+    })
+    os.environ.setdefault("ORIANA_LLM_RPM", "1000000")
+    os.environ.setdefault("ORIANA_LLM_TPM", "1000000000")
+    # One log line per request would drown the report.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    started = time.perf_counter()
+    stages = run(urls, args.transcripts)
+    report = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "pages": len(pages),
+            "html_kb": sum(len(body) for _, body, _ in pages) / 1024,
+            "page_latency_ms": args.page_latency,
+            "llm_latency_ms": args.llm_latency,
+            "llm_words": args.llm_words,
+            "llm_workers": int(os.getenv("ORIANA_LLM_WORKERS", 4)),
+            "total_seconds": time.perf_counter() - started,
+        },
+        "stages": stages,
+    }
+    page_stand_in.shutdown()
+    llm_stub.shutdown()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{len(pages)} pages, {report['meta']['html_kb']:.0f} KB of HTML, "
+          f"stub LLM {args.llm_latency:.0f} ms per answer")
+    print(f"{'stage':10} {'calls':>6} {'per sec':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage in STAGES:
+        result = stages[stage]
+        print(f"{stage:10} {result['calls']:6} {result['per_second']:9.1f} "
+              f"{result['p50_ms']:9.1f} {result['p95_ms']:9.1f} {result['p99_ms']:9.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
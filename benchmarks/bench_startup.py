@@ -0,0 +1,131 @@
+# Reports how long Oriana takes to start, per component.
+#
+#   python benchmarks/bench_startup.py [--repeat 5] [--init]
+#
+# Every import is timed in a fresh interpreter so earlier imports don't hide
+# later ones. --init also constructs Oriana and touches each lazy component,
+# with the same secrets as the app (.streamlit/secrets.toml or the
+# environment). Steps that fail are reported and the rest are still timed;
+# the GitHub repo is only timed when a GITHUB_TOKEN is configured.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTS = [
+    "streamlit",
+    "httpx",
+    "bs4",
+    "newspaper",
+    "github",
+    "openai",
+    "groq",
+    "nltk",
+    "main_functions",
+]
+
+# (name, statement, condition for running it at all)
+INIT_STEPS = [
+    ("Oriana()", "oriana = main_functions.Oriana()", None),
+    ("page_cache", "oriana.page_cache", None),
+    ("llm_cache", "oriana.llm_cache", None),
+    ("llm_scheduler", "oriana.llm_scheduler", None),
+    ("github repo", "oriana.repo", "main_functions.GITHUB_TOKEN"),
+    ("sources", "oriana.sources", None),
+    ("resources", "oriana.resources", None),
+    ("openai client", "main_functions.get_openai()", None),
+]
+
+TIMER = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+"""
+
+INIT_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import main_functions
+timings = {{}}
+for name, statement, condition in {steps!r}:
+    if condition and not eval(condition):
+        continue
+    start = time.perf_counter()
+    try:
+        exec(statement)
+        timings[name] = time.perf_counter() - start
+    except Exception as e:
+        timings[name] = f"{{type(e).__name__}}: {{e}}"
+print(json.dumps(timings))
+"""
+
+
+def run(code):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def time_imports(repeat):
+    timings = {}
+    for module in IMPORTS:
+        samples = []
+        for _ in range(repeat):
+            try:
+                samples.append(float(run(TIMER.format(root=ROOT, statement=f"import {module}"))))
+            except subprocess.CalledProcessError as e:
+                print(f"Error importing {module}: {e.stderr.strip().splitlines()[-1]}")
+                break
+        if samples:
+            timings[module] = statistics.median(samples)
+    return timings
+
+
+def time_init(repeat):
+    runs = []
+    for _ in range(repeat):
+        try:
+            runs.append(json.loads(run(INIT_SCRIPT.format(root=ROOT, steps=INIT_STEPS))))
+        except subprocess.CalledProcessError as e:
+            print(f"Error initializing Oriana: {e.stderr.strip().splitlines()[-1]}")
+            return {}
+    timings = {}
+    for name, _, _ in INIT_STEPS:
+        samples = [run[name] for run in runs if name in run]
+        seconds = [sample for sample in samples if isinstance(sample, float)]
+        if seconds:
+            timings[name] = statistics.median(seconds)
+        elif samples:
+            print(f"Error in {name}: {samples[-1]}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Oriana's startup cost per component.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--init", action="store_true", help="also time Oriana() and its lazy components")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = {"python": sys.version.split()[0], "imports": time_imports(args.repeat)}
+    if args.init:
+        results["init"] = time_init(args.repeat)
+
+    for section in ("imports", "init"):
+        for name, seconds in results.get(section, {}).items():
+            print(f"{section:8} {name:16} {seconds * 1000:9.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# A corpus of recorded pages for the offline benchmarks.
+#
+#   python benchmarks/corpus.py urls.txt [--out benchmarks/pages]
+#
+# Each page is saved as <sha1 of url>.html, and index.json maps the URLs to
+# the files and their content types.
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(ROOT, "benchmarks", "pages")
+
+
+def load_index(directory=CORPUS_DIR):
+    try:
+        with open(os.path.join(directory, "index.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def load(directory=CORPUS_DIR):
+    pages = []
+    for url, entry in load_index(directory).items():
+        with open(os.path.join(directory, entry["file"]), "rb") as f:
+            pages.append((url, f.read(), entry.get("content_type", "text/html")))
+    return pages
+
+
+def record(urls, directory=CORPUS_DIR):
+    sys.path.insert(0, ROOT)
+    import http_client
+
+    os.makedirs(directory, exist_ok=True)
+    index = load_index(directory)
+    for url in urls:
+        try:
+            response = http_client.get(url)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Error recording {url}: {str(e)}")
+            continue
+        name = hashlib.sha1(url.encode()).hexdigest() + ".html"
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(response.content)
+        index[url] = {"file": name, "content_type": response.headers.get("content-type", "text/html")}
+        print(f"Recorded {url} ({len(response.content)} bytes)")
+    with open(os.path.join(directory, "index.json"), "w") as f:
+        json.dump(index, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record pages for the offline benchmarks.")
+    parser.add_argument("urls", help="file with one URL per line")
+    parser.add_argument("--out", default=CORPUS_DIR)
+    args = parser.parse_args()
+    with open(args.urls) as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    record(urls, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import logging
+import os
+import re
+import threading
+from functools import lru_cache
+
+from llm_scheduler import estimate_tokens
+
+CHUNK_TOKENS = int(os.getenv("ORIANA_CHUNK_TOKENS", 1500))
+MAX_CHUNKS = int(os.getenv("ORIANA_MAX_CHUNKS", 12))
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+(?=[A-Z"\'])')
+PUNKT_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def load_punkt():
+    # nltk with punkt installed, or None. Downloads at most once per process,
+    # and only when punkt isn't installed already.
+    try:
+        import nltk
+        try:
+            nltk.data.find('tokenizers/punkt')
+        except LookupError:
+            nltk.download('punkt', quiet=True)
+            nltk.data.find('tokenizers/punkt')
+        return nltk
+    except Exception as e:
+        logging.info(f"punkt unavailable, splitting sentences on punctuation: {str(e)}")
+        return None
+
+
+def ensure_punkt():
+    # Scheduler threads split sentences concurrently; only one of them loads punkt.
+    with PUNKT_LOCK:
+        return load_punkt()
+
+
+def split_sentences(text):
+    nltk = ensure_punkt()
+    if nltk is not None:
+        try:
+            return nltk.sent_tokenize(text)
+        except LookupError:
+            pass
+    # punkt unavailable (e.g. offline); a plain punctuation split is close enough.
+    return SENTENCE_END.split(text)
+
+
+def chunk_text(text, chunk_tokens=CHUNK_TOKENS, max_chunks=MAX_CHUNKS):
+    # Grow the chunks rather than exceed max_chunks, so the parallel map step
+    # stays one round of LLM calls however long the document is.
+    chunk_tokens = max(chunk_tokens, estimate_tokens(text) // max_chunks + 1)
+    chunks = []
+    current = []
+    size = 0
+    for sentence in split_sentences(text):
+        tokens = estimate_tokens(sentence)
+        if current and size + tokens > chunk_tokens:
+            chunks.append(' '.join(current))
+            current = []
+            size = 0
+        current.append(sentence)
+        size += tokens
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
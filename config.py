@@ -0,0 +1,45 @@
+import os
+import sys
+from functools import lru_cache
+
+# Secrets for the app, the crawler and the CLI. Inside Streamlit they come
+# from st.secrets as before; elsewhere from environment variables (and .env),
+# then from the same secrets.toml files Streamlit would read, so headless runs
+# don't need Streamlit at all.
+
+SECRETS_FILES = [
+    os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"),
+    os.path.join(".streamlit", "secrets.toml"),
+]
+
+
+@lru_cache(maxsize=None)
+def secrets_files():
+    import tomllib
+    secrets = {}
+    for path in SECRETS_FILES:
+        try:
+            with open(path, 'rb') as f:
+                secrets.update(tomllib.load(f))
+        except FileNotFoundError:
+            continue
+    return secrets
+
+
+def streamlit_secret(name):
+    # Only when the app has already imported Streamlit; importing it here would
+    # cost headless runs a second of startup.
+    st = sys.modules.get("streamlit")
+    if st is None:
+        return None
+    try:
+        return st.secrets.get(name)
+    except Exception:
+        return None
+
+
+def get(name, default=None):
+    for value in (streamlit_secret(name), os.getenv(name), secrets_files().get(name)):
+        if value is not None:
+            return value
+    return default
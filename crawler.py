@@ -0,0 +1,117 @@
+# Keeps Oriana's caches warm so interactive queries don't wait on the network.
+#
+#   python crawler.py [--once] [--interval 900] [--summarize]
+#
+# Every round re-reads each source and resource page (through the page cache,
+# so unchanged pages cost a conditional request) and adds it to the archive,
+# then crawls their feeds for new articles. With --summarize the new articles
+# are summarized too, which fills the response cache, the duplicate index and
+# the related-stories index ahead of time. The app can run the same loop in a
+# background thread instead (ORIANA_BACKGROUND_CRAWL=1).
+import argparse
+import logging
+import os
+import threading
+import time
+
+from batch import fetch_documents
+from persistence import FLUSH_TIMEOUT
+
+CRAWL_INTERVAL = int(os.getenv("ORIANA_CRAWL_INTERVAL", 15 * 60))
+CRAWL_SUMMARIZE = os.getenv("ORIANA_CRAWL_SUMMARIZE", "0") == "1"
+BACKGROUND_CRAWL = os.getenv("ORIANA_BACKGROUND_CRAWL", "0") == "1"
+
+
+class Crawler:
+
+    def __init__(self, oriana, interval=CRAWL_INTERVAL, summarize=CRAWL_SUMMARIZE):
+        self.oriana = oriana
+        self.interval = interval
+        self.summarize = summarize
+        self.stopped = threading.Event()
+        self.thread = None
+        self.last_round = None
+
+    def targets(self):
+        return list(dict.fromkeys(list(self.oriana.sources) + list(self.oriana.get_resources().values())))
+
+    def warm_pages(self, urls):
+        warmed = 0
+        for document in fetch_documents(self.oriana, urls):
+            if document is not None:
+                self.oriana.index_document(document)
+                warmed += 1
+        return warmed
+
+    def summarize_entries(self, entries):
+        articles = []
+        for entry in entries:
+            articles += self.oriana.get_webpage_articles("", entry['url'])
+        return self.oriana.summarize_articles(articles, max_articles=len(articles))
+
+    def run_once(self):
+        started = time.time()
+        urls = self.targets()
+        stats = {'pages': 0, 'new_articles': 0, 'summaries': 0}
+        try:
+            stats['pages'] = self.warm_pages(urls)
+        except Exception as e:
+            logging.error(f"Error warming pages: {str(e)}")
+        for url in urls:
+            if self.stopped.is_set():
+                break
+            try:
+                entries = self.oriana.crawl_source(url)
+                stats['new_articles'] += len(entries)
+                if self.summarize and entries:
+                    stats['summaries'] += len(self.summarize_entries(entries))
+            except Exception as e:
+                logging.error(f"Error crawling {url}: {str(e)}")
+        stats['seconds'] = round(time.time() - started, 1)
+        self.last_round = {**stats, 'finished_at': time.time()}
+        logging.info(f"Crawled {len(urls)} sources and resources: {stats}")
+        return stats
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.run_once()
+            self.stopped.wait(self.interval)
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run, name="oriana-crawler", daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warm Oriana's sources and resources.")
+    parser.add_argument("--once", action="store_true", help="run a single round and exit")
+    parser.add_argument("--interval", type=int, default=CRAWL_INTERVAL, help="seconds between rounds")
+    parser.add_argument("--summarize", action="store_true", default=CRAWL_SUMMARIZE,
+                        help="also summarize newly found articles")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from main_functions import Oriana
+    oriana = Oriana()
+    crawler = Crawler(oriana, args.interval, args.summarize)
+    try:
+        if args.once:
+            crawler.run_once()
+        else:
+            crawler.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        oriana.flush(FLUSH_TIMEOUT)
+
+
+if __name__ == "__main__":
+    main()
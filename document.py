@@ -0,0 +1,67 @@
+from extraction import extract
+
+
+class Document:
+    # One fetched page. Each representation (parsed tree, page text, article
+    # fields) is computed at most once and shared by every caller.
+
+    def __init__(self, url, raw, html, fetched_at=None):
+        self.url = url
+        self.raw = raw
+        self.html = html
+        self.fetched_at = fetched_at
+        self._tree = None
+        self._text = None
+        self._links = None
+        self._article = None
+
+    @classmethod
+    def from_page(cls, url, page):
+        return cls(url, page.body, page.text, page.fetched_at)
+
+    def _parse(self):
+        self._text, self._links, self._tree = extract(self.html, self.url)
+
+    @property
+    def tree(self):
+        if self._text is None:
+            self._parse()
+        if self._tree is None:
+            # The streaming backend keeps no tree; build one only if asked for.
+            import lxml.html
+            self._tree = lxml.html.fromstring(self.html)
+        return self._tree
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._parse()
+        return self._text
+
+    @property
+    def links(self):
+        if self._links is None:
+            self._parse()
+        return self._links
+
+    @property
+    def article(self):
+        if self._article is None:
+            from newspaper import Article
+            article = Article(self.url)
+            article.download(input_html=self.html)
+            article.parse()
+            self._article = article
+        return self._article
+
+    @property
+    def title(self):
+        return self.article.title
+
+    @property
+    def article_text(self):
+        return self.article.text
+
+    @property
+    def publish_date(self):
+        return self.article.publish_date
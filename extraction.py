@@ -0,0 +1,81 @@
+import os
+import re
+from urllib.parse import urljoin
+
+BOILERPLATE_TAGS = ["script", "style", "meta", "noscript", "header", "footer"]
+CONTENT_TAGS = ['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li']
+EXTRACTION_BACKEND = os.getenv("ORIANA_EXTRACTION_BACKEND", "lxml")
+FEED_SIZE = 64 * 1024
+
+# Both backends return (text, links, tree). text is the whitespace-collapsed
+# text of every p/h1-h6/li element outside boilerplate, in document order;
+# links are absolute hrefs. Only bs4 keeps a tree.
+
+
+def extract_bs4(html, url):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    links = [urljoin(url, a['href']) for a in soup.find_all('a', href=True)]
+    for node in soup(BOILERPLATE_TAGS):
+        node.decompose()
+    content = ' '.join([p.get_text() for p in soup.find_all(CONTENT_TAGS)])
+    return re.sub(r'\s+', ' ', content).strip(), links, soup
+
+
+def extract_lxml(html, url):
+    # Streams the page through lxml's pull parser: boilerplate subtrees are
+    # emptied as soon as they close, and everything outside a content element
+    # is dropped once handled, so the full tree is never held in memory.
+    from lxml import etree
+    parser = etree.HTMLPullParser(events=('start', 'end'), remove_comments=True, remove_pis=True)
+    texts = []
+    slots = []
+    links = []
+    content_depth = 0
+    boilerplate_depth = 0
+
+    def handle(events):
+        nonlocal content_depth, boilerplate_depth
+        for event, element in events:
+            tag = element.tag if isinstance(element.tag, str) else ''
+            if event == 'start':
+                if tag == 'a' and element.get('href'):
+                    links.append(urljoin(url, element.get('href')))
+                if tag in BOILERPLATE_TAGS:
+                    boilerplate_depth += 1
+                elif tag in CONTENT_TAGS and not boilerplate_depth:
+                    # Reserve the slot at the start tag to keep find_all's order.
+                    slots.append(len(texts))
+                    texts.append('')
+                    content_depth += 1
+                continue
+            if tag in BOILERPLATE_TAGS:
+                boilerplate_depth -= 1
+                element.clear(keep_tail=True)
+            elif tag in CONTENT_TAGS and not boilerplate_depth:
+                texts[slots.pop()] = ''.join(element.itertext())
+                content_depth -= 1
+            if content_depth == 0 and tag not in ('html', 'body'):
+                # Tails outside content elements are never needed.
+                element.clear()
+                parent = element.getparent()
+                if parent is not None:
+                    while element.getprevious() is not None:
+                        del parent[0]
+
+    for start in range(0, len(html), FEED_SIZE):
+        parser.feed(html[start:start + FEED_SIZE])
+        handle(parser.read_events())
+    parser.close()
+    handle(parser.read_events())
+    return re.sub(r'\s+', ' ', ' '.join(texts)).strip(), links, None
+
+
+BACKENDS = {
+    'bs4': extract_bs4,
+    'lxml': extract_lxml,
+}
+
+
+def extract(html, url, backend=None):
+    return BACKENDS[backend or EXTRACTION_BACKEND](html, url)
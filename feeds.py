@@ -0,0 +1,145 @@
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin, urlsplit
+
+CRAWL_MAX_ENTRIES = int(os.getenv("ORIANA_CRAWL_MAX_ENTRIES", 25))
+CRAWL_MAX_SITEMAPS = int(os.getenv("ORIANA_CRAWL_MAX_SITEMAPS", 3))
+SEEN_URLS = 500
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml', 'application/feed+xml')
+SITEMAP_LINE = re.compile(r'^\s*sitemap:\s*(\S+)', re.IGNORECASE | re.MULTILINE)
+
+# A source's feeds are found once: <link rel="alternate"> tags on the page,
+# else the Sitemap lines of robots.txt, else /sitemap.xml, and found again
+# when none of them can be read. Each crawl then fetches only those (small,
+# and revalidated through the page cache) and keeps a high-water mark per
+# source so only newer entries are returned.
+#
+# Entries are dicts with url, title and published (UTC timestamp or None).
+
+
+def feed_links(html, base_url):
+    import lxml.html
+    tree = lxml.html.fromstring(html)
+    return [
+        urljoin(base_url, link.get('href'))
+        for link in tree.iter('link')
+        if link.get('href')
+        and 'alternate' in (link.get('rel') or '').lower().split()
+        and (link.get('type') or '').lower() in FEED_TYPES
+    ]
+
+
+def robots_url(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/robots.txt"
+
+
+def robots_sitemaps(text):
+    return SITEMAP_LINE.findall(text)
+
+
+def parse_date(value):
+    if isinstance(value, dict):
+        value = value.get('#text')
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        date = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
+
+
+def text_of(value):
+    if isinstance(value, dict):
+        value = value.get('#text')
+    return value.strip() if isinstance(value, str) else None
+
+
+def as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def atom_link(links):
+    for link in as_list(links):
+        if isinstance(link, str):
+            return link
+        if link.get('@rel', 'alternate') == 'alternate' and link.get('@href'):
+            return link['@href']
+    return None
+
+
+def parse_feed(body):
+    # Returns (entries, child sitemaps) for RSS, Atom, a sitemap or a sitemap index.
+    import xmltodict
+    document = xmltodict.parse(body)
+    entries = []
+    children = []
+    if 'rss' in document:
+        channel = document['rss'].get('channel') or {}
+        for item in as_list(channel.get('item')):
+            entries.append({
+                'url': text_of(item.get('link')) or text_of(item.get('guid')),
+                'title': text_of(item.get('title')),
+                'published': parse_date(item.get('pubDate') or item.get('dc:date')),
+            })
+    elif 'feed' in document:
+        for entry in as_list(document['feed'].get('entry')):
+            entries.append({
+                'url': atom_link(entry.get('link')),
+                'title': text_of(entry.get('title')),
+                'published': parse_date(entry.get('published') or entry.get('updated')),
+            })
+    elif 'urlset' in document:
+        for url in as_list(document['urlset'].get('url')):
+            news = url.get('news:news') or {}
+            entries.append({
+                'url': text_of(url.get('loc')),
+                'title': text_of(news.get('news:title')),
+                'published': parse_date(news.get('news:publication_date') or url.get('lastmod')),
+            })
+    elif 'sitemapindex' in document:
+        for sitemap in as_list(document['sitemapindex'].get('sitemap')):
+            children.append({
+                'url': text_of(sitemap.get('loc')),
+                'published': parse_date(sitemap.get('lastmod')),
+            })
+    return [entry for entry in entries if entry['url']], [child for child in children if child['url']]
+
+
+def is_new(entry, mark):
+    if entry['published'] is not None:
+        return entry['published'] > mark.get('published', 0)
+    return entry['url'] not in mark.get('seen', [])
+
+
+def newest_first(entries):
+    return sorted(entries, key=lambda entry: entry['published'] or 0, reverse=True)
+
+
+def new_entries(entries, mark, limit=CRAWL_MAX_ENTRIES):
+    unique = {}
+    for entry in entries:
+        unique.setdefault(entry['url'], entry)
+    return newest_first([entry for entry in unique.values() if is_new(entry, mark)])[:limit]
+
+
+def advance(mark, entries):
+    published = [entry['published'] for entry in entries if entry['published'] is not None]
+    seen = [entry['url'] for entry in entries] + mark.get('seen', [])
+    return {
+        **mark,
+        'published': max(published + [mark.get('published', 0)]),
+        'seen': list(dict.fromkeys(seen))[:SEEN_URLS],
+        'crawled_at': datetime.now(timezone.utc).timestamp(),
+    }
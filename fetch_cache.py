@@ -0,0 +1,140 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+CACHE_DIR = os.getenv("ORIANA_CACHE_DIR", ".oriana_cache")
+PAGE_CACHE_MAX_BYTES = int(os.getenv("ORIANA_PAGE_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+PAGE_CACHE_TTL = int(os.getenv("ORIANA_PAGE_CACHE_TTL", 300))
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+
+def normalize_url(url):
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path or "/"
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ]
+    return urlunsplit((scheme, host, path, urlencode(sorted(query)), ""))
+
+
+class CachedPage:
+
+    def __init__(self, url, body, headers, fetched_at, ttl=PAGE_CACHE_TTL):
+        self.url = url
+        self.body = body
+        self.headers = headers
+        self.fetched_at = fetched_at
+        self.ttl = ttl
+
+    @property
+    def text(self):
+        match = re.search(r"charset=([\w-]+)", self.headers.get("content-type", ""), re.I)
+        encoding = match.group(1) if match else "utf-8"
+        try:
+            return self.body.decode(encoding, errors="replace")
+        except LookupError:
+            return self.body.decode("utf-8", errors="replace")
+
+    def max_age(self):
+        cache_control = self.headers.get("cache-control", "").lower()
+        if "no-cache" in cache_control or "no-store" in cache_control:
+            return 0
+        match = re.search(r"max-age=(\d+)", cache_control)
+        if match:
+            return int(match.group(1))
+        expires = self.headers.get("expires")
+        if expires:
+            try:
+                return max(0, parsedate_to_datetime(expires).timestamp() - self.fetched_at)
+            except (TypeError, ValueError):
+                pass
+        return self.ttl
+
+    def is_fresh(self):
+        return time.time() - self.fetched_at < self.max_age()
+
+    def validators(self):
+        headers = {}
+        if self.headers.get("etag"):
+            headers["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+class PageCache:
+
+    def __init__(self, path=None, max_bytes=PAGE_CACHE_MAX_BYTES, ttl=PAGE_CACHE_TTL):
+        self.path = path or os.path.join(CACHE_DIR, "pages.sqlite3")
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, body BLOB, headers TEXT, "
+            "fetched_at REAL, last_access REAL, size INTEGER)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)")
+        self.conn.commit()
+
+    def get(self, url):
+        key = normalize_url(url)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, headers, fetched_at FROM pages WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), key))
+            self.conn.commit()
+        return CachedPage(key, row[0], json.loads(row[1]), row[2], self.ttl)
+
+    def put(self, url, headers, body):
+        key = normalize_url(url)
+        headers = {name.lower(): value for name, value in headers.items()}
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                (key, body, json.dumps(headers), now, now, len(body)),
+            )
+            self._evict()
+            self.conn.commit()
+        return CachedPage(key, body, headers, now, self.ttl)
+
+    def revalidated(self, page, headers):
+        # A 304 may carry updated caching headers; keep the stored body.
+        merged = dict(page.headers)
+        merged.update({name.lower(): value for name, value in headers.items()})
+        return self.put(page.url, merged, page.body)
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self.conn.execute(
+            "SELECT url, size FROM pages ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM pages")
+            self.conn.commit()
@@ -0,0 +1,85 @@
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+
+HTTP_TIMEOUT = float(os.getenv("ORIANA_HTTP_TIMEOUT", 10))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("ORIANA_HTTP_CONNECT_TIMEOUT", 5))
+HTTP_MAX_CONNECTIONS = int(os.getenv("ORIANA_HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_PER_HOST = int(os.getenv("ORIANA_HTTP_MAX_PER_HOST", 6))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("ORIANA_HTTP_KEEPALIVE_EXPIRY", 60))
+HTTP2 = os.getenv("ORIANA_HTTP2", "1") == "1"
+HTTP_COMPRESSION = os.getenv("ORIANA_HTTP_COMPRESSION", "1") == "1"
+
+_client = None
+_client_lock = threading.Lock()
+_host_slots = {}
+
+
+def http2_enabled():
+    if not HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401  (httpx needs it for HTTP/2)
+        return True
+    except ImportError:
+        return False
+
+
+def default_headers():
+    headers = {'User-Agent': USER_AGENT}
+    if not HTTP_COMPRESSION:
+        headers['Accept-Encoding'] = 'identity'
+    return headers
+
+
+def client_options():
+    import httpx
+    return {
+        'headers': default_headers(),
+        'timeout': httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        'limits': httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        'http2': http2_enabled(),
+        'follow_redirects': True,
+    }
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import httpx
+                _client = httpx.Client(**client_options())
+    return _client
+
+
+@contextmanager
+def host_slot(url):
+    # httpx only limits the pool as a whole, so cap connections per host here.
+    host = urlsplit(url).netloc.lower()
+    with _client_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = _host_slots[host] = threading.BoundedSemaphore(HTTP_MAX_PER_HOST)
+    with slot:
+        yield
+
+
+def get(url, headers=None):
+    with host_slot(url):
+        return get_client().get(url, headers=headers)
+
+
+def close():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from storage import DATA_DIR
+
+JOB_WORKERS = int(os.getenv("ORIANA_JOB_WORKERS", 2))
+JOB_RETENTION = int(os.getenv("ORIANA_JOB_RETENTION", 7 * 24 * 60 * 60))
+SAVE_INTERVAL = 0.5
+
+# Long-running work (summarizing a batch, writing a transcript) runs here
+# instead of inside a Streamlit script run. Each job is a row in SQLite, so a
+# rerun or a browser refresh can pick it up again by ID and render whatever
+# partial results it has. A handler gets a Job and reports through it:
+#
+#   job.set_total(n); job.add_result(i, value)    one result per input item
+#   job.set_result(text)                          a result that grows, e.g. a stream
+#
+# and checks job.cancelled between steps. Jobs left unfinished by a previous
+# process are queued again when the queue starts.
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+
+    def __init__(self, queue, row):
+        self.queue = queue
+        self.id = row['id']
+        self.kind = row['kind']
+        self.params = row['params']
+        self.total = row['total']
+        self.results = row['results']
+        self.completed = row['completed']
+        self.result = row['result']
+        self.saved_at = 0
+
+    @property
+    def cancelled(self):
+        return self.queue.cancel_requested(self.id)
+
+    def set_total(self, total):
+        self.total = total
+        self.results = [None] * total
+        self.completed = 0
+        self.save(force=True)
+
+    def add_result(self, index, value):
+        self.results[index] = value
+        self.completed += 1
+        self.save(force=True)
+
+    def set_result(self, value):
+        self.result = value
+        self.save()
+
+    def save(self, force=False):
+        # Streaming handlers report often; write at most every SAVE_INTERVAL seconds.
+        now = time.time()
+        if force or now - self.saved_at >= SAVE_INTERVAL:
+            self.saved_at = now
+            self.queue.update(self.id, total=self.total, completed=self.completed,
+                              results=self.results, result=self.result)
+
+
+class JobQueue:
+
+    def __init__(self, path=None, workers=JOB_WORKERS):
+        self.path = path or os.path.join(DATA_DIR, "jobs.sqlite3")
+        self.handlers = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="oriana-job")
+        self.started = False
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT, status TEXT, params TEXT, total INTEGER, completed INTEGER, "
+            "results TEXT, result TEXT, error TEXT, cancel_requested INTEGER, created_at REAL, updated_at REAL)"
+        )
+        self.conn.commit()
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    def start(self):
+        # Called once the handlers are registered: resume unfinished jobs, drop old ones.
+        with self.lock:
+            if self.started:
+                return self
+            self.started = True
+            self.conn.execute("DELETE FROM jobs WHERE updated_at < ?", (time.time() - JOB_RETENTION,))
+            self.conn.commit()
+            unfinished = self.conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        for row in unfinished:
+            self.update(row['id'], status=QUEUED)
+            self.executor.submit(self.run, row['id'])
+        return self
+
+    def submit(self, kind, params):
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.start()
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO jobs VALUES (?, ?, ?, ?, 0, 0, '[]', NULL, NULL, 0, ?, ?)",
+                (job_id, kind, QUEUED, json.dumps(params), now, now),
+            )
+            self.conn.commit()
+        self.executor.submit(self.run, job_id)
+        return job_id
+
+    def run(self, job_id):
+        row = self.get(job_id)
+        if row is None or row['status'] in FINISHED:
+            return
+        if row['cancel_requested']:
+            self.update(job_id, status=CANCELLED)
+            return
+        self.update(job_id, status=RUNNING)
+        job = Job(self, row)
+        try:
+            result = self.handlers[row['kind']](job, **row['params'])
+            if result is not None:
+                job.result = result
+            job.save(force=True)
+            self.update(job_id, status=CANCELLED if job.cancelled else DONE)
+        except Exception as e:
+            logging.error(f"Error in {row['kind']} job {job_id}: {str(e)}")
+            job.save(force=True)
+            self.update(job_id, status=FAILED, error=str(e))
+
+    def get(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ('params', 'results', 'result'):
+            job[field] = json.loads(job[field]) if job[field] is not None else None
+        return job
+
+    def update(self, job_id, **fields):
+        for field in ('results', 'result'):
+            if field in fields:
+                fields[field] = json.dumps(fields[field], default=str)
+        fields['updated_at'] = time.time()
+        assignments = ', '.join(f"{field} = ?" for field in fields)
+        with self.lock:
+            self.conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self.conn.commit()
+
+    def cancel(self, job_id):
+        self.update(job_id, cancel_requested=1)
+
+    def cancel_requested(self, job_id):
+        with self.lock:
+            row = self.conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
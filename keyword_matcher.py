@@ -0,0 +1,181 @@
+import re
+from bisect import bisect_right
+from functools import lru_cache
+
+# Query syntax, on top of the comma-separated keyword list the UI always had:
+#
+#   climate change, carbon tax          either phrase (commas mean OR)
+#   "carbon tax" AND senate             both terms
+#   tariffs NOT "steel tariffs"         first term without the second
+#   senate NEAR/5 "carbon tax"          terms within 5 words of each other
+#
+# Terms are matched case-insensitively on word boundaries. Operators must be
+# upper case so ordinary words like "not" stay part of a phrase.
+
+OPERATOR = re.compile(r'\s+(AND|NOT|(?:NEAR|WITHIN)/\d+)(?=\s)')
+WORD = re.compile(r'\w+')
+OPERATOR_WORD = re.compile(r'AND|NOT|(?:NEAR|WITHIN)/\d+')
+
+
+def is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+def lower_preserving_offsets(text):
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # A few characters (e.g. 'İ') grow when lowercased; keep offsets aligned.
+    return ''.join(ch.lower() if len(ch.lower()) == 1 else ch for ch in text)
+
+
+def trie_pattern(node):
+    # Nested alternation over a character trie, so the regex engine tries each
+    # character once per position however many terms share it. Longer terms
+    # come before the end of a shorter one.
+    branches = [
+        re.escape(ch) + trie_pattern(child) for ch, child in sorted(node.items()) if ch != ''
+    ]
+    if '' in node:
+        branches.append(node[''])
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')'
+
+
+class TermPattern:
+    # Every occurrence of every term, found with one compiled regex. Each
+    # search returns the longest term starting at the first position with a
+    # match; the next search starts one character later, so terms overlapping
+    # it ("tax" within "carbon tax") are still found. Shorter terms that are
+    # prefixes of the match are checked directly.
+
+    def __init__(self, terms):
+        self.index = {term: index for index, term in enumerate(terms)}
+        self.prefixes = {
+            term: [(self.index[other], len(other)) for other in terms if other != term and term.startswith(other)]
+            for term in terms
+        }
+        trie = {}
+        for term in terms:
+            node = trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[''] = r'\b' if is_word_char(term[-1]) else ''
+        # \b only before terms that start with a word character.
+        starts = [
+            (r'\b' if is_word_char(ch) else '') + re.escape(ch) + trie_pattern(child)
+            for ch, child in sorted(trie.items())
+        ]
+        self.pattern = re.compile('|'.join(starts)) if starts else None
+
+    def scan(self, text):
+        if self.pattern is None:
+            return
+        position = 0
+        while match := self.pattern.search(text, position):
+            term = match.group()
+            start = match.start()
+            yield self.index[term], start, start + len(term)
+            for index, length in self.prefixes[term]:
+                end = start + length
+                if is_word_char(text[end - 1]) and end < len(text) and is_word_char(text[end]):
+                    continue
+                yield index, start, end
+            position = start + 1
+
+
+class MatchResult:
+
+    def __init__(self, matched, matches, counts, offsets):
+        self.matched = matched
+        self.matches = matches
+        self.counts = counts
+        self.offsets = offsets
+
+    def __bool__(self):
+        return self.matched
+
+
+class KeywordMatcher:
+
+    def __init__(self, query):
+        self.query = query
+        self.clauses = [self.parse_clause(clause) for clause in query.split(',')]
+        self.clauses = [clause for clause in self.clauses if clause]
+        self.terms = sorted({term for clause in self.clauses for _, term in clause})
+        self.pattern = TermPattern(self.terms)
+        self.uses_proximity = any(op.startswith(('NEAR', 'WITHIN')) for clause in self.clauses for op, _ in clause)
+
+    @staticmethod
+    def parse_clause(clause):
+        # Pad so a leading NOT is found too; split alternates text, operator, text...
+        parts = OPERATOR.split(' ' + clause.strip() + ' ')
+        terms = []
+        op = 'AND'
+        for i, part in enumerate(parts):
+            if i % 2:
+                op = part
+                continue
+            term = ' '.join(part.strip().strip('"').lower().split())
+            if term:
+                terms.append((op, term))
+                op = 'AND'
+        return terms
+
+    def positive_terms(self):
+        return [term for clause in self.clauses for op, term in clause if op != 'NOT']
+
+    def search(self, text):
+        lowered = lower_preserving_offsets(text)
+        offsets = {term: [] for term in self.terms}
+        hits = []
+        for index, start, end in self.pattern.scan(lowered):
+            term = self.terms[index]
+            offsets[term].append((start, end))
+            hits.append((start, end))
+
+        word_starts = [m.start() for m in WORD.finditer(lowered)] if self.uses_proximity else None
+        matched = any(self.clause_matches(clause, offsets, word_starts) for clause in self.clauses)
+        hits.sort()
+        return MatchResult(
+            matched,
+            [lowered[start:end] for start, end in hits],
+            {term: len(spans) for term, spans in offsets.items()},
+            offsets,
+        )
+
+    @staticmethod
+    def clause_matches(clause, offsets, word_starts):
+        previous = None
+        for op, term in clause:
+            spans = offsets[term]
+            if op == 'NOT':
+                if spans:
+                    return False
+                continue
+            if not spans:
+                return False
+            if op.startswith(('NEAR', 'WITHIN')) and previous is not None:
+                distance = int(op.split('/')[1])
+                near = [bisect_right(word_starts, start) for start, _ in previous]
+                if not any(abs(bisect_right(word_starts, start) - other) <= distance
+                           for start, _ in spans for other in near):
+                    return False
+            previous = spans
+        return True
+
+
+def normalize_query(query):
+    # Same query, same string: lowercase terms (not operators), collapse
+    # whitespace and sort the comma-separated alternatives.
+    clauses = {
+        ' '.join(word if OPERATOR_WORD.fullmatch(word) else word.lower() for word in clause.split())
+        for clause in query.split(',')
+    }
+    return ', '.join(sorted(clause for clause in clauses if clause))
+
+
+@lru_cache(maxsize=256)
+def compile_query(query):
+    return KeywordMatcher(query)
@@ -0,0 +1,116 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+LLM_WORKERS = int(os.getenv("ORIANA_LLM_WORKERS", 4))
+LLM_RPM = int(os.getenv("ORIANA_LLM_RPM", 60))
+LLM_TPM = int(os.getenv("ORIANA_LLM_TPM", 60000))
+LLM_MAX_RETRIES = int(os.getenv("ORIANA_LLM_MAX_RETRIES", 5))
+
+
+def estimate_tokens(text):
+    # Roughly four characters per token for English text.
+    return len(text) // 4 + 1
+
+
+def is_rate_limit(error):
+    return getattr(error, 'http_status', None) == 429 or type(error).__name__ == 'RateLimitError'
+
+
+def retry_after(error):
+    headers = getattr(error, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after') or headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, amount):
+        # Take the tokens now (possibly going negative) and return how long
+        # the caller has to wait for the bucket to cover them.
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+
+class LLMScheduler:
+
+    def __init__(self, complete, workers=LLM_WORKERS, rpm=LLM_RPM, tpm=LLM_TPM,
+                 max_tokens=800, max_retries=LLM_MAX_RETRIES):
+        self.complete = complete
+        self.max_tokens = max_tokens
+        self.max_retries = max_retries
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+        self.workers = workers
+        # One pool per nesting level: a task that maps sub-tasks (e.g. the
+        # chunks of a long article) must not wait on its own, possibly full, pool.
+        self.executors = []
+        self.local = threading.local()
+
+    def wait_for_budget(self, prompt):
+        wait = max(
+            self.requests.reserve(1),
+            self.tokens.reserve(estimate_tokens(prompt) + self.max_tokens),
+        )
+        with self.lock:
+            wait = max(wait, self.paused_until - time.monotonic())
+        if wait > 0:
+            time.sleep(wait)
+
+    def call(self, prompt, complete=None, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.wait_for_budget(prompt)
+            try:
+                return (complete or self.complete)(prompt, **kwargs)
+            except Exception as e:
+                if not is_rate_limit(e) or attempt == self.max_retries:
+                    raise
+                delay = retry_after(e) or min(60.0, 2 ** attempt + random.random())
+                # A 429 means the provider's window is exhausted for everyone,
+                # so hold back every worker, not only this one.
+                with self.lock:
+                    self.paused_until = max(self.paused_until, time.monotonic() + delay)
+
+    def executor(self):
+        depth = getattr(self.local, 'depth', 0)
+        with self.lock:
+            while len(self.executors) <= depth:
+                self.executors.append(ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f"oriana-llm-{len(self.executors)}"
+                ))
+            return self.executors[depth], depth
+
+    def submit(self, fn, item):
+        executor, depth = self.executor()
+
+        def run():
+            self.local.depth = depth + 1
+            return fn(item)
+
+        return executor.submit(run)
+
+    def map(self, fn, items):
+        futures = [self.submit(fn, item) for item in items]
+        return [future.result() for future in futures]
+
+    def imap_unordered(self, fn, items):
+        futures = {self.submit(fn, item): index for index, item in enumerate(items)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -1,69 +1,199 @@
+import asyncio
 import os
 from dotenv import load_dotenv
-from groq import Groq
-import streamlit as st
-import requests
-from bs4 import BeautifulSoup
-import re
+import config
 from datetime import datetime
-import json
-from newspaper import Article
 import logging
-import nltk
-from github import Github
-import base64
-import openai
-
-# Set your OpenAI API key (make sure you have added it to your Streamlit secrets or environment variables)
-openai.api_key = st.secrets["OPENAI_API_KEY"]
-
-nltk.download('punkt', quiet=True)
-
-# Load environment variables and initialize clients
+import threading
+from collections import OrderedDict
+from functools import cached_property, lru_cache
+import hashlib
+from fetch_cache import PageCache, normalize_url
+from document import Document
+import http_client
+from llm_scheduler import LLMScheduler, estimate_tokens
+from llm_cache import ResponseCache, cache_key
+from persistence import GitHubWriter
+from storage import create_store, SQLiteStore, GITHUB_MIRROR
+from keyword_matcher import compile_query, normalize_query
+from passages import select_context, select_passages, title_query, CONTEXT_TOKENS
+from chunking import chunk_text
+from ranking import rank_by_tfidf
+from batch import fetch_documents, summarize_urls
+from jobs import JobQueue
+from search_index import SearchIndex
+from summary_index import SummaryIndex
+from near_duplicates import DuplicateIndex, simhash, is_duplicate
+from feeds import (feed_links, robots_url, robots_sitemaps, parse_feed, is_new, new_entries, newest_first,
+                   advance, CRAWL_MAX_ENTRIES, CRAWL_MAX_SITEMAPS)
+from urllib.parse import urljoin
+from datetime import timezone
+
+# Load environment variables; clients and heavy modules are created on first use
 load_dotenv()
-groq_client = Groq(api_key=st.secrets["GROQ_API_KEY"])
 #HUGGINGFACE_API_KEY = st.secrets["HUGGINGFACE_API_KEY"]
-GITHUB_TOKEN = st.secrets["GITHUB_TOKEN"]
-GITHUB_REPO = st.secrets["GITHUB_REPO"]
+GITHUB_TOKEN = config.get("GITHUB_TOKEN")
+GITHUB_REPO = config.get("GITHUB_REPO")
+LLM_MODEL = "gpt-3.5-turbo"  # or "gpt-4" if you have access
+# "map_reduce" summarizes long articles chunk by chunk; "passages" sends only the best passages
+SUMMARY_MODE = os.getenv("ORIANA_SUMMARY_MODE", "map_reduce")
+
+@lru_cache(maxsize=None)
+def get_openai():
+    import openai
+    # Set your OpenAI API key (make sure you have added it to your Streamlit secrets or environment variables)
+    openai.api_key = config.get("OPENAI_API_KEY")
+    return openai
+
+@lru_cache(maxsize=None)
+def get_groq_client():
+    from groq import Groq
+    return Groq(api_key=config.get("GROQ_API_KEY"))
+
+
+class shared_property(cached_property):
+    # cached_property without a lock (as on Python 3.12+) lets threads racing on
+    # first access each build their own scheduler, index or job queue. Build
+    # each one once per Oriana, with a lock per attribute so a slow one (the
+    # GitHub repo) doesn't hold up the rest.
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        cache = instance.__dict__
+        if self.attrname in cache:
+            return cache[self.attrname]
+        with instance.property_locks_lock:
+            lock = instance.property_locks.setdefault(self.attrname, threading.Lock())
+        with lock:
+            if self.attrname not in cache:
+                cache[self.attrname] = self.func(instance)
+            return cache[self.attrname]
+
 
 class Oriana:
 
     def __init__(self):
-        self.sources = []
-        self.resources = {}
-        self.github_client = Github(GITHUB_TOKEN)
-        self.repo = self.github_client.get_repo(GITHUB_REPO)
-        self.load_sources()
-        self.load_resources()
+        # Sources and resources are loaded from GitHub on first access.
+        self._sources = None
+        self._resources = None
+        # Set once a load succeeds; until then nothing is saved over the stored lists.
+        self.sources_loaded = False
+        self.resources_loaded = False
+        self.documents = OrderedDict()
+        self.documents_lock = threading.Lock()
+        self.property_locks = {}
+        self.property_locks_lock = threading.Lock()
+
+    @shared_property
+    def page_cache(self):
+        return PageCache()
+
+    @shared_property
+    def llm_cache(self):
+        return ResponseCache()
+
+    @shared_property
+    def llm_scheduler(self):
+        return LLMScheduler(self.complete)
+
+    @shared_property
+    def duplicate_index(self):
+        return DuplicateIndex()
+
+    @shared_property
+    def summary_index(self):
+        return SummaryIndex()
+
+    @shared_property
+    def search_index(self):
+        return SearchIndex()
+
+    @shared_property
+    def crawl_state(self):
+        # Per-source crawl marks are local bookkeeping and never mirrored to GitHub.
+        return SQLiteStore()
+
+    @shared_property
+    def job_queue(self):
+        queue = JobQueue()
+        queue.register('summarize_urls', self.summarize_urls_job)
+        queue.register('transcript', self.transcript_job)
+        return queue.start()
+
+    @shared_property
+    def github_client(self):
+        from github import Github
+        return Github(GITHUB_TOKEN)
+
+    @shared_property
+    def repo(self):
+        return self.github_client.get_repo(GITHUB_REPO)
+
+    @shared_property
+    def github_writer(self):
+        return GitHubWriter(lambda: self.repo)
+
+    @shared_property
+    def store(self):
+        # Without a GitHub token there is nothing to mirror to.
+        return create_store(lambda: self.repo, lambda: self.github_writer,
+                            github_mirror=GITHUB_MIRROR and bool(GITHUB_TOKEN))
+
+    @property
+    def sources(self):
+        if self._sources is None:
+            self.load_sources()
+        return self._sources
+
+    @sources.setter
+    def sources(self, value):
+        self._sources = value
+
+    @property
+    def resources(self):
+        if self._resources is None:
+            self.load_resources()
+        return self._resources
+
+    @resources.setter
+    def resources(self, value):
+        self._resources = value
 
     def load_sources(self):
         try:
-            content = self.repo.get_contents("sources.json")
-            self.sources = json.loads(base64.b64decode(content.content).decode())
+            self.sources = self.store.load("sources") or []
+            self.sources_loaded = True
         except Exception as e:
-            logging.error(f"Error loading sources from GitHub: {str(e)}")
+            logging.error(f"Error loading sources: {str(e)}")
             self.sources = []
 
+    def editable_sources(self):
+        # A failed load leaves an empty list; saving it would wipe the stored one.
+        if not self.sources_loaded:
+            self.load_sources()
+        if not self.sources_loaded:
+            raise ValueError("Sources could not be loaded, so they can't be changed right now. Please try again later.")
+        return self.sources
+
     def save_sources(self):
-        try:
-            content = self.repo.get_contents("sources.json")
-            self.repo.update_file(
-                "sources.json",
-                "Update sources",
-                json.dumps(self.sources),
-                content.sha
-            )
-        except Exception as e:
-            logging.error(f"Error saving sources to GitHub: {str(e)}")
+        # Local write; a GitHub mirror is committed in the background.
+        self.store.save("sources", self.editable_sources())
+
+    def flush(self, timeout=None):
+        if 'github_writer' not in self.__dict__:
+            return True
+        return self.github_writer.flush(timeout)
 
     def add_source(self, url):
-        if url not in self.sources:
-            self.sources.append(url)
+        sources = self.editable_sources()
+        if url not in sources:
+            sources.append(url)
             self.save_sources()
 
     def remove_source(self, url):
         logging.info(f"Attempting to remove source: {url}")
-        if url in self.sources:
+        if url in self.editable_sources():
             self.sources.remove(url)
             logging.info(f"Source removed from self.sources. Updated sources: {self.sources}")
             self.save_sources()
@@ -74,33 +204,32 @@ class Oriana:
 
     def load_resources(self):
         try:
-            content = self.repo.get_contents("resources.json")
-            self.resources = json.loads(base64.b64decode(content.content).decode())
+            self.resources = self.store.load("resources") or {}
+            self.resources_loaded = True
         except Exception as e:
-            logging.error(f"Error loading resources from GitHub: {str(e)}")
+            logging.error(f"Error loading resources: {str(e)}")
             self.resources = {}
 
+    def editable_resources(self):
+        if not self.resources_loaded:
+            self.load_resources()
+        if not self.resources_loaded:
+            raise ValueError("Resources could not be loaded, so they can't be changed right now. Please try again later.")
+        return self.resources
+
     def save_resources(self):
-        try:
-            content = self.repo.get_contents("resources.json")
-            self.repo.update_file(
-                "resources.json",
-                "Update resources",
-                json.dumps(self.resources),
-                content.sha
-            )
-        except Exception as e:
-            logging.error(f"Error saving resources to GitHub: {str(e)}")
+        self.store.save("resources", self.editable_resources())
 
     def add_resource(self, name, url):
-        if len(self.resources) < 30:
-            self.resources[name] = url
+        resources = self.editable_resources()
+        if len(resources) < 30:
+            resources[name] = url
             self.save_resources()
         else:
             raise ValueError("Maximum number of resources (30) reached. Please remove some before adding more.")
 
     def remove_resource(self, name):
-        if name in self.resources:
+        if name in self.editable_resources():
             del self.resources[name]
             self.save_resources()
 
@@ -109,129 +238,438 @@ class Oriana:
 
     def search_source(self, keywords, source):
         try:
-            content = self.scrape_specific_url(source)
-            
-            keyword_list = [keyword.strip().lower() for keyword in keywords.split(',')]
-            pattern = '|'.join(r'\b{}\b'.format(re.escape(keyword)) for keyword in keyword_list)
+            document = self.get_document(source)
+            content = document.text
+            self.index_document(document)
             
-            matches = re.findall(pattern, content.lower())
+            result = compile_query(keywords).search(content)
             
-            if matches:
-                return [{
-                    'url': source,
-                    'content': content,
-                    'timestamp': datetime.now().isoformat(),
-                    'matches': matches
-                }]
+            if result.matched:
+                return [self.search_result(source, document, result)]
             else:
                 return []
         except Exception as e:
             print(f"Error searching {source}: {str(e)}")
             return []
 
-    def scrape_specific_url(self, url):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+    def fetch_url(self, url):
+        cached = self.page_cache.get(url)
+        if cached and cached.is_fresh():
+            return cached
+
+        headers = cached.validators() if cached else {}
+        response = http_client.get(url, headers=headers)
+        return self.store_response(url, cached, response)
+
+    async def fetch_url_async(self, url, client):
+        # The page cache is SQLite behind a lock; keep it off the event loop.
+        cached = await asyncio.to_thread(self.page_cache.get, url)
+        if cached and cached.is_fresh():
+            return cached
+
+        headers = cached.validators() if cached else {}
+        response = await client.get(url, headers=headers)
+        return await asyncio.to_thread(self.store_response, url, cached, response)
+
+    def store_response(self, url, cached, response):
+        if response.status_code == 304 and cached:
+            return self.page_cache.revalidated(cached, response.headers)
+        response.raise_for_status()
+        return self.page_cache.put(url, response.headers, response.content)
+
+    def get_document(self, url, page=None, max_documents=32):
+        page = page or self.fetch_url(url)
+        key = normalize_url(url)
+        with self.documents_lock:
+            document = self.documents.get(key)
+            if document is None or document.fetched_at != page.fetched_at:
+                document = Document.from_page(url, page)
+                self.documents[key] = document
+            self.documents.move_to_end(key)
+            while len(self.documents) > max_documents:
+                self.documents.popitem(last=False)
+        return document
+
+    def index_document(self, document, title=None, publish_date=None):
+        try:
+            self.search_index.add(document.url, document.text, title, publish_date, document.fetched_at)
+        except Exception as e:
+            logging.error(f"Error indexing {document.url}: {str(e)}")
+
+    def search_archive(self, query, limit=20):
+        try:
+            return self.search_index.search(query, limit)
+        except Exception as e:
+            print(f"Error searching archive: {str(e)}")
+            return []
+
+    def discover_feeds(self, source):
+        try:
+            feeds = feed_links(self.get_document(source).raw, source)
+            if feeds:
+                return feeds
+        except Exception as e:
+            print(f"Error discovering feeds for {source}: {str(e)}")
+        try:
+            sitemaps = robots_sitemaps(self.fetch_url(robots_url(source)).text)
+            if sitemaps:
+                return sitemaps
+        except Exception as e:
+            logging.info(f"No robots.txt for {source}: {str(e)}")
+        return [urljoin(source, '/sitemap.xml')]
+
+    def feed_entries(self, feed, mark):
+        # None if the feed could not be read at all.
+        try:
+            entries, sitemaps = parse_feed(self.fetch_url(feed).body)
+        except Exception as e:
+            print(f"Error reading feed {feed}: {str(e)}")
+            return None
+        # Sitemap indexes: only follow the child sitemaps that changed since the last crawl.
+        for sitemap in newest_first([sitemap for sitemap in sitemaps if is_new(sitemap, mark)])[:CRAWL_MAX_SITEMAPS]:
+            entries += self.feed_entries(sitemap['url'], mark) or []
+        return entries
+
+    def read_feeds(self, feeds, mark):
+        results = [self.feed_entries(feed, mark) for feed in feeds]
+        entries = [entry for result in results if result for entry in result]
+        return entries, any(result is not None for result in results)
+
+    def crawl_source(self, source, limit=CRAWL_MAX_ENTRIES):
+        # Fetch and index only the entries published since the last crawl.
+        name = f"crawl:{normalize_url(source)}"
+        mark = self.crawl_state.load(name) or {}
+        stored = mark.get('feeds')
+        feeds = stored or self.discover_feeds(source)
+        entries, readable = self.read_feeds(feeds, mark)
+        if not readable and stored:
+            # Every stored feed failed; the site may have moved them, so look again.
+            feeds = self.discover_feeds(source)
+            if feeds != stored:
+                entries, readable = self.read_feeds(feeds, mark)
+        # Keep feeds only once one of them works, so a guessed /sitemap.xml
+        # that doesn't exist is discovered again on the next crawl.
+        mark['feeds'] = feeds if readable else None
+        fresh = new_entries(entries, mark, limit)
+
+        documents = fetch_documents(self, [entry['url'] for entry in fresh]) if fresh else []
+        for entry, document in zip(fresh, documents):
+            if document is not None:
+                published = datetime.fromtimestamp(entry['published'], timezone.utc) if entry['published'] else None
+                self.index_document(document, entry['title'], published)
+        self.crawl_state.save(name, advance(mark, fresh))
+        return fresh
+
+    def crawl_sources(self):
+        return {source: self.crawl_source(source) for source in self.sources}
+
+    def content_fingerprint(self, url):
+        try:
+            return hashlib.sha256(self.get_document(url).text.encode()).hexdigest()
+        except Exception as e:
+            print(f"Error fingerprinting {url}: {str(e)}")
+            return None
+
+    def normalize_keywords(self, keywords):
+        return normalize_query(keywords)
+
+    def result_title(self, result):
+        # The page's headline for the related-stories list; None shows the URL instead.
+        try:
+            return result['document'].title or None
+        except Exception as e:
+            logging.info(f"No title for {result['url']}: {str(e)}")
+            return None
+
+    def search_result(self, source, document, result):
+        return {
+            'url': source,
+            'content': document.text,
+            'document': document,
+            'timestamp': datetime.now().isoformat(),
+            'matches': result.matches,
+            'counts': result.counts,
+            'offsets': result.offsets
         }
+
+    def scrape_specific_url(self, url):
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            for script in soup(["script", "style", "meta", "noscript", "header", "footer"]):
-                script.decompose()
-            
-            content = ' '.join([p.get_text() for p in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li'])])
-            content = re.sub(r'\s+', ' ', content).strip()
-            
-            return content
+            document = self.get_document(url)
+            self.index_document(document)
+            return document.text
         except Exception as e:
             print(f"Error scraping {url}: {str(e)}")
             return f"Unable to retrieve content from {url}"
 
-    def get_webpage_articles(self, subject, url):
+    def get_webpage_articles(self, subject, url, page=None):
         try:
-            article = self.extract_article(url)
+            article = self.extract_article(url, page)
             if subject.lower() in article['text'].lower():
                 return [{
                     'title': article['title'],
                     'url': url,
                     'content': article['text'],
                     'published_date': article['publish_date'] or datetime.now().isoformat(),
-                    'source': url
+                    'source': url,
+                    'document': article['document'],
+                    'keywords': subject
                 }]
             return []
         except Exception as e:
             print(f"Error processing webpage {url}: {str(e)}")
             return []
 
-    def extract_article(self, url):
-        article = Article(url)
-        article.download()
-        article.parse()
+    def extract_article(self, url, page=None):
+        document = self.get_document(url, page)
+        self.index_document(document, document.title, document.publish_date)
         return {
-            'title': article.title,
-            'text': article.text,
-            'publish_date': article.publish_date
+            'title': document.title,
+            'text': document.article_text,
+            'publish_date': document.publish_date,
+            'document': document
         }
 
-    def summarize_articles(self, articles, max_articles=5):
-        summaries = []
-        for article in articles[:max_articles]:
-            try:
-                prompt = f"""Summarize the following article in 2-3 paragraphs:
+    def summarize_articles(self, articles, max_articles=5, stream=False):
+        if stream:
+            # Each summary is a token generator, started when it's consumed.
+            summaries = [self.summarize_article(article, stream=True) for article in articles[:max_articles]]
+        else:
+            summaries = self.llm_scheduler.map(self.summarize_article, articles[:max_articles])
+        return [summary for summary in summaries if summary]
 
-                Title: {article['title']}
-                Content: {article['content'][:3000]}
+    def summarize_article(self, article, stream=False):
+        fingerprint = None
+        claimed = False
+        try:
+            fingerprint = simhash(article['content'])
+            if not stream:
+                in_progress = self.duplicate_index.claim(fingerprint)
+                claimed = fingerprint is not None and in_progress is None
+                if in_progress:
+                    # A copy of this story is being summarized right now; wait for it,
+                    # but not forever: on timeout this copy is summarized on its own.
+                    in_progress.wait(self.duplicate_index.wait)
+            duplicate = self.duplicate_index.find(fingerprint)
+            if duplicate:
+                summary = iter([duplicate['summary']]) if stream else duplicate['summary']
+                result = self.summary_result(article, summary)
+                if duplicate['url'] != article['url']:
+                    result['duplicate_of'] = duplicate['url']
+                return result
+
+            if SUMMARY_MODE == "map_reduce" and estimate_tokens(article['content']) > CONTEXT_TOKENS:
+                prompt = self.map_reduce_prompt(article)
+            else:
+                prompt = self.summary_prompt(article)
+            
+            summary = self.ask(prompt, stream)
+            if stream:
+                summary = self.record_stream(summary, lambda text: self.remember_summary(article, fingerprint, text))
+            else:
+                self.remember_summary(article, fingerprint, summary)
+            return self.summary_result(article, summary)
+        except Exception as e:
+            print(f"Error summarizing article {article['url']}: {str(e)}")
+            return None
+        finally:
+            if claimed:
+                self.duplicate_index.release(fingerprint)
 
-                Provide a concise summary that captures the main points of the article. 
-                If the content seems incomplete or irrelevant, mention this in your summary."""
-                
-                summary = self.investigative_journalist_agent(prompt)
-                summaries.append({
-                    'title': article['title'],
-                    'url': article['url'],
-                    'summary': summary,
-                    'published_date': article['published_date'],
-                    'source': article['source']
-                })
-            except Exception as e:
-                print(f"Error summarizing article {article['url']}: {str(e)}")
-        return summaries
-
-    def answer_question(self, keywords, source):
+    def summary_result(self, article, summary):
+        return {
+            'title': article['title'],
+            'url': article['url'],
+            'summary': summary,
+            'published_date': article['published_date'],
+            'source': article['source']
+        }
+
+    def remember_summary(self, article, fingerprint, summary):
+        if not summary.startswith("Error in investigative_journalist_agent"):
+            self.duplicate_index.put(article['url'], fingerprint, article['title'], summary)
+            self.remember_story(article['url'], article['title'], summary)
+
+    def remember_story(self, url, title, summary):
+        if summary.startswith("Error in investigative_journalist_agent"):
+            return
+        try:
+            self.summary_index.add(url, title, summary)
+        except Exception as e:
+            logging.error(f"Error saving summary of {url}: {str(e)}")
+
+    def related_stories(self, summary, exclude_url=None, k=5):
+        try:
+            return self.summary_index.related(summary, k, exclude_url)
+        except Exception as e:
+            print(f"Error finding related stories: {str(e)}")
+            return []
+
+    def record_stream(self, chunks, remember):
+        # Pass a token stream through, then keep the full text once it ends.
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        remember(''.join(parts).strip())
+
+    def summary_prompt(self, article, content=None):
+        return f"""Summarize the following article in 2-3 paragraphs:
+
+            Title: {article['title']}
+            Content: {content or self.article_context(article)}
+
+            Provide a concise summary that captures the main points of the article. 
+            If the content seems incomplete or irrelevant, mention this in your summary."""
+
+    def map_reduce_prompt(self, article):
+        # Map: summarize every chunk in parallel. Chunk prompts only depend on the
+        # chunk text, so repeated chunks are answered from the response cache.
+        chunks = chunk_text(article['content'])
+        if len(chunks) == 1:
+            # Fits in one chunk: summarize the full text in a single call.
+            return self.summary_prompt(article, article['content'])
+        prompts = [
+            f"""Summarize part {i} of {len(chunks)} of the article "{article['title']}" in one short paragraph.
+            Keep names, numbers, dates and quotes that matter. Do not add anything that is not in the text.
+
+            {chunk}"""
+            for i, chunk in enumerate(chunks, 1)
+        ]
+        partials = [
+            partial for partial in self.llm_scheduler.map(self.investigative_journalist_agent, prompts)
+            if not partial.startswith("Error in investigative_journalist_agent")
+        ]
+        if not partials:
+            return self.summary_prompt(article)
+
+        # Reduce: one final call over the partial summaries.
+        notes = '\n\n'.join(f"Part {i}: {partial}" for i, partial in enumerate(partials, 1))
+        return f"""Summarize the following article in 2-3 paragraphs, using these summaries of its consecutive parts:
+
+            Title: {article['title']}
+
+            {notes}
+
+            Provide a concise summary that captures the main points of the whole article. 
+            If the content seems incomplete or irrelevant, mention this in your summary."""
+
+    def article_context(self, article):
+        # Articles from a keyword search are focused on the keywords; otherwise
+        # the title's words stand in for them.
+        query = article.get('keywords') or title_query(article['title'])
+        return select_context(article['content'], query, CONTEXT_TOKENS)
+
+    def answer_question(self, keywords, source, stream=False):
         results = self.search_source(keywords, source)
         
         if not results:
-            return f"No relevant information found from the selected source ({source}) using the provided keywords: {keywords}. Please try different keywords or check if the article content matches your search terms."
-    
-        content = results[0]['content']
-        matches = results[0]['matches']
+            message = f"No relevant information found from the selected source ({source}) using the provided keywords: {keywords}. Please try different keywords or check if the article content matches your search terms."
+            return iter([message]) if stream else message
+
+        answer = self.ask(self.answer_prompt(source, results[0]), stream)
+        title = self.result_title(results[0])
+        if stream:
+            return self.record_stream(answer, lambda text: self.remember_story(source, title, text))
+        self.remember_story(source, title, answer)
+        return answer
+
+    def answer_prompt(self, source, result):
+        content = result['content']
+        # Each matched term once; the full hit list can outgrow the context itself
+        key_points = [term for term, count in result['counts'].items() if count]
+        # Send the passages around the keyword hits, not just the top of the page
+        context = select_passages(content, result['offsets'], CONTEXT_TOKENS)
         
-        prompt = f"""Based on the following information from {source}:
+        return f"""Based on the following information from {source}:
 
-        {content[:3000]}  # Limit content to first 3000 characters to avoid token limits
+        {context}
 
-        Summarize the article, focusing on the following key points: {', '.join(matches)}
+        Summarize the article, focusing on the following key points: {', '.join(key_points)}
 
         Provide a concise summary that captures the main points of the article, especially those related to the key points mentioned above. If any key points are not addressed in the article, mention that they were not found in the content."""
 
-        return self.investigative_journalist_agent(prompt)
-
-    def generate_news_transcript(self, selected_answers, max_answers=5):
+    def investigate_all_sources(self, keywords, top_k=3):
+        # Scrape every source concurrently, keep the pages matching the query,
+        # rank them by TF-IDF similarity and only summarize the top_k.
+        sources = list(self.sources)
+        matcher = compile_query(keywords)
+        candidates = []
+        for source, document in zip(sources, fetch_documents(self, sources)):
+            if document is None:
+                continue
+            self.index_document(document)
+            result = matcher.search(document.text)
+            if result.matched:
+                candidates.append(self.search_result(source, document, result))
+
+        scores = rank_by_tfidf(' '.join(matcher.positive_terms()), [c['content'] for c in candidates])
+        for candidate, score in zip(candidates, scores):
+            candidate['score'] = score
+        top = sorted(candidates, key=lambda c: c['score'], reverse=True)[:top_k]
+
+        answers = self.llm_scheduler.map(
+            lambda result: self.investigative_journalist_agent(self.answer_prompt(result['url'], result)), top
+        )
+        for result, answer in zip(top, answers):
+            self.remember_story(result['url'], self.result_title(result), answer)
+        return [{
+            'source': result['url'],
+            'score': result['score'],
+            'counts': result['counts'],
+            'answer': answer
+        } for result, answer in zip(top, answers)]
+
+    def generate_news_transcript(self, selected_answers, max_answers=5, stream=False):
+        selected_answers = self.distinct_answers(selected_answers)
         transcript = "News Transcript:\n\n"
         for i, answer in enumerate(selected_answers[:max_answers], 1):
             transcript += f"Story {i}:\n{answer}\n\n"
         
+        if stream:
+            return self.stream_news_transcript(transcript, selected_answers[:max_answers])
+
         script = self.generate_summary_script(selected_answers[:max_answers])
         
         full_content = f"{transcript}\nSummarized Script:\n\n{script}"
         
         return full_content
 
-    def generate_summary_script(self, answers):
+    def distinct_answers(self, answers):
+        # Syndicated copies of one story reuse the same summary; tell it once.
+        kept = []
+        seen = set()
+        fingerprints = []
+        for answer in answers:
+            text = answer.split(': ', 1)[-1].strip()
+            fingerprint = simhash(text)
+            if text in seen or any(is_duplicate(fingerprint, other) for other in fingerprints):
+                continue
+            kept.append(answer)
+            seen.add(text)
+            fingerprints.append(fingerprint)
+        return kept
+
+    def summarize_urls_job(self, job, urls):
+        job.set_total(len(urls))
+        summarize_urls(self, urls, on_summary=job.add_result, cancelled=lambda: job.cancelled)
+
+    def transcript_job(self, job, answers):
+        text = ""
+        for chunk in self.generate_news_transcript(answers, stream=True):
+            if job.cancelled:
+                break
+            text += chunk
+            job.set_result(text)
+        return text
+
+    def stream_news_transcript(self, transcript, answers):
+        yield f"{transcript}\nSummarized Script:\n\n"
+        yield from self.generate_summary_script(answers, stream=True)
+
+    def generate_summary_script(self, answers, stream=False):
         if not answers:
-            return "No stories to summarize."
+            message = "No stories to summarize."
+            return iter([message]) if stream else message
     
         prompt = f"""Based on the following news stories and Write in the style and vocabulary level of a high school aged student:
 
@@ -245,33 +683,84 @@ class Oriana:
         
         Keep the script concise, ideally round 300-500 words, and suitable for reading aloud."""
 
+        return self.ask(prompt, stream)
+
+    def ask(self, prompt, stream=False):
+        if stream:
+            return self.investigative_journalist_agent_stream(prompt)
         return self.investigative_journalist_agent(prompt)
     
     def investigative_journalist_agent(self, prompt):
-        current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        system_message = (
+        system_message = self.system_message()
+        key = cache_key(LLM_MODEL, system_message, prompt)
+        cached = self.llm_cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            answer = self.llm_scheduler.call(prompt, system_message=system_message)
+        except Exception as e:
+            return f"Error in investigative_journalist_agent: {str(e)}"
+        self.llm_cache.put(key, answer)
+        return answer
+
+    def investigative_journalist_agent_stream(self, prompt):
+        system_message = self.system_message()
+        key = cache_key(LLM_MODEL, system_message, prompt)
+        cached = self.llm_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        try:
+            chunks = self.llm_scheduler.call(prompt, complete=self.complete_stream, system_message=system_message)
+            for chunk in chunks:
+                content = chunk.choices[0].delta.get("content")
+                if content:
+                    parts.append(content)
+                    yield content
+        except Exception as e:
+            yield f"Error in investigative_journalist_agent: {str(e)}"
+            return
+        self.llm_cache.put(key, ''.join(parts).strip())
+
+    def system_message(self):
+        # Only the date, so the prompt (and its cache key) is stable for a whole day.
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        return (
             f"You are an expert investigative journalist with a knack for getting at the truth. "
-            f"Today's date and time is {current_datetime}. Always use this as the current date and time when responding. "
+            f"Today's date is {current_date}. Always use this as the current date when responding. "
             "Provide concise, first-person responses in a confrontational style as if you're a front-line journalist. "
             "Focus on answering the user's question directly and critically using only the information provided in the prompt. "
             "Include sources (URLs) only if they are provided in the prompt. If the information is insufficient to answer the question, "
             "state this clearly. Avoid speculation or using external knowledge. Keep your answer under 400 words."
         )
-    
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",  # or "gpt-4" if you have access
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=800,
-                temperature=0.7,
-            )
+
+    def complete(self, prompt, system_message=None):
+        response = get_openai().ChatCompletion.create(
+            model=LLM_MODEL,
+            messages=[
+                {"role": "system", "content": system_message or self.system_message()},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=800,
+            temperature=0.7,
+        )
         # Extract and return the assistant's reply
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            return f"Error in investigative_journalist_agent: {str(e)}"
+        return response.choices[0].message.content.strip()
+
+    def complete_stream(self, prompt, system_message=None):
+        return get_openai().ChatCompletion.create(
+            model=LLM_MODEL,
+            messages=[
+                {"role": "system", "content": system_message or self.system_message()},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=800,
+            temperature=0.7,
+            stream=True,
+        )
 
 # import os
 # from dotenv import load_dotenv
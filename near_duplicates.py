@@ -0,0 +1,140 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from fetch_cache import CACHE_DIR
+
+DUPLICATE_DISTANCE = int(os.getenv("ORIANA_DUPLICATE_DISTANCE", 3))
+DUPLICATE_MIN_WORDS = int(os.getenv("ORIANA_DUPLICATE_MIN_WORDS", 50))
+DUPLICATE_MAX_ENTRIES = int(os.getenv("ORIANA_DUPLICATE_MAX_ENTRIES", 20000))
+DUPLICATE_WAIT = float(os.getenv("ORIANA_DUPLICATE_WAIT", 120))
+SHINGLE_WORDS = 4
+BANDS = 4
+BAND_BITS = 64 // BANDS
+WORD = re.compile(r'\w+')
+
+# Syndicated copies of a story differ by a byline, a dateline or a trailing
+# paragraph. A 64-bit SimHash over word shingles moves only a few bits for
+# such edits, so two articles whose fingerprints are within
+# DUPLICATE_DISTANCE bits are treated as the same story. With 4 bands of
+# 16 bits, any such pair agrees on at least one whole band, which is what
+# the index looks up.
+
+
+def simhash(text):
+    words = WORD.findall(text.lower())
+    if len(words) < DUPLICATE_MIN_WORDS:
+        # Too short to tell a copy from a different story on the same topic.
+        return None
+    weights = [0] * 64
+    for i in range(len(words) - SHINGLE_WORDS + 1):
+        shingle = ' '.join(words[i:i + SHINGLE_WORDS])
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def bands(fingerprint):
+    mask = (1 << BAND_BITS) - 1
+    return [fingerprint >> (band * BAND_BITS) & mask for band in range(BANDS)]
+
+
+def to_signed(fingerprint):
+    # SQLite integers are signed 64-bit.
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def is_duplicate(a, b, max_distance=DUPLICATE_DISTANCE):
+    return a is not None and b is not None and distance(a, b) <= max_distance
+
+
+class DuplicateIndex:
+    # Fingerprint -> summary of every article summarized so far. claim() also
+    # tracks articles being summarized right now, so concurrent copies of one
+    # story wait for the first summary instead of each paying for their own.
+
+    def __init__(self, path=None, max_distance=DUPLICATE_DISTANCE, max_entries=DUPLICATE_MAX_ENTRIES,
+                 wait=DUPLICATE_WAIT):
+        self.path = path or os.path.join(CACHE_DIR, "duplicates.sqlite3")
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.wait = wait
+        self.lock = threading.Lock()
+        self.pending = {}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "url TEXT PRIMARY KEY, fingerprint INTEGER, b0 INTEGER, b1 INTEGER, b2 INTEGER, b3 INTEGER, "
+            "title TEXT, summary TEXT, created_at REAL)"
+        )
+        for band in range(BANDS):
+            self.conn.execute(f"CREATE INDEX IF NOT EXISTS fingerprints_b{band} ON fingerprints (b{band})")
+        self.conn.commit()
+
+    def find(self, fingerprint):
+        if fingerprint is None:
+            return None
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT url, fingerprint, title, summary FROM fingerprints "
+                "WHERE b0 = ? OR b1 = ? OR b2 = ? OR b3 = ?", bands(fingerprint)
+            ).fetchall()
+        best = None
+        for url, other, title, summary in rows:
+            d = distance(fingerprint, other % (1 << 64))
+            if d <= self.max_distance and (best is None or d < best[0]):
+                best = (d, {'url': url, 'title': title, 'summary': summary})
+        return best[1] if best else None
+
+    def put(self, url, fingerprint, title, summary):
+        if fingerprint is None:
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, to_signed(fingerprint), *bands(fingerprint), title, summary, time.time()),
+            )
+            self.conn.execute(
+                "DELETE FROM fingerprints WHERE url IN (SELECT url FROM fingerprints "
+                "ORDER BY created_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+            )
+            self.conn.commit()
+
+    def claim(self, fingerprint):
+        # Returns None if the caller should summarize, or an Event that is set
+        # once the near-duplicate already in progress has been summarized.
+        # Waiters should give up after self.wait seconds; a claim older than
+        # that (its summarizer hung or died) no longer holds anyone up.
+        if fingerprint is None:
+            return None
+        now = time.time()
+        with self.lock:
+            for other, (done, claimed_at) in list(self.pending.items()):
+                if now - claimed_at > self.wait:
+                    del self.pending[other]
+                    done.set()
+                elif distance(fingerprint, other) <= self.max_distance:
+                    return done
+            self.pending[fingerprint] = (threading.Event(), now)
+        return None
+
+    def release(self, fingerprint):
+        with self.lock:
+            done, _ = self.pending.pop(fingerprint, (None, None))
+        if done:
+            done.set()
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM fingerprints")
+            self.conn.commit()
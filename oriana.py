@@ -0,0 +1,117 @@
+# Command-line entry point for running Oriana without the Streamlit app.
+#
+#   python -m oriana summarize urls.txt --out results.jsonl --workers 16
+#
+# URLs are read one per line (blank lines and # comments are skipped; "-"
+# reads stdin) and processed as a stream. Each result is appended to the
+# output as one JSON line as soon as it is ready, so the output file is also
+# the checkpoint: running the same command again skips every URL that already
+# has a result and retries the ones that failed.
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+
+from batch import summarize_each, BATCH_WORKERS
+from llm_scheduler import LLMScheduler, LLM_WORKERS, LLM_RPM, LLM_TPM
+from persistence import FLUSH_TIMEOUT
+
+ERROR_PREFIX = "Error in investigative_journalist_agent"
+
+
+def read_urls(path):
+    with (sys.stdin if path == "-" else open(path)) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+def load_checkpoint(path):
+    # URLs with a final answer; failed ones are tried again.
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'rb+') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interruption
+            if record.get('status') in ('ok', 'no_article'):
+                done.add(record['url'])
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+    return done
+
+
+def record_for(url, summary, error):
+    if error is None and summary is not None and summary['summary'].startswith(ERROR_PREFIX):
+        error = summary['summary']
+    if error is not None:
+        return {'url': url, 'status': 'error', 'error': error}
+    if summary is None:
+        return {'url': url, 'status': 'no_article'}
+    return {'url': url, 'status': 'ok', **{key: value for key, value in summary.items() if key != 'url'}}
+
+
+def summarize(args):
+    from main_functions import Oriana
+    oriana = Oriana()
+    oriana.llm_scheduler = LLMScheduler(oriana.complete, workers=args.llm_workers, rpm=args.rpm, tpm=args.tpm)
+
+    done = load_checkpoint(args.out)
+    urls = (url for url in read_urls(args.input) if url not in done)
+    if done:
+        logging.info(f"Resuming: {len(done)} URLs already in {args.out}")
+
+    counts = {'ok': 0, 'no_article': 0, 'error': 0}
+    lock = threading.Lock()
+    with open(args.out, 'a', encoding='utf-8') as out:
+
+        def write(url, summary, error):
+            record = record_for(url, summary, error)
+            with lock:
+                out.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                out.flush()
+                counts[record['status']] += 1
+                done.add(url)
+            logging.info(f"{record['status']}: {url}")
+
+        try:
+            summarize_each(oriana, urls, write, workers=args.workers, subject=args.subject)
+        except KeyboardInterrupt:
+            logging.info(f"Interrupted; run the same command again to resume from {args.out}")
+            return 130
+        finally:
+            oriana.flush(FLUSH_TIMEOUT)
+    logging.info(f"Finished: {counts}")
+    return 1 if counts['error'] else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="oriana", description="Run Oriana from the command line.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("summarize", help="summarize a list of article URLs into JSONL")
+    command.add_argument("input", help="file with one URL per line, or - for stdin")
+    command.add_argument("--out", default="results.jsonl", help="JSONL output, also used to resume")
+    command.add_argument("--workers", type=int, default=BATCH_WORKERS, help="URLs fetched and processed at once")
+    command.add_argument("--llm-workers", type=int, default=LLM_WORKERS, help="parallel LLM requests")
+    command.add_argument("--rpm", type=int, default=LLM_RPM, help="LLM requests per minute")
+    command.add_argument("--tpm", type=int, default=LLM_TPM, help="LLM tokens per minute")
+    command.add_argument("--subject", default="", help="only summarize articles mentioning this text")
+    command.set_defaults(run=summarize)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
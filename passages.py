@@ -0,0 +1,89 @@
+import os
+import re
+
+from keyword_matcher import compile_query
+from llm_scheduler import estimate_tokens
+
+CONTEXT_TOKENS = int(os.getenv("ORIANA_CONTEXT_TOKENS", 750))
+PASSAGE_RADIUS = int(os.getenv("ORIANA_PASSAGE_RADIUS", 300))
+TITLE_WORD = re.compile(r"[A-Za-z][\w'-]{3,}")
+
+
+def snap(text, start, end):
+    # Widen to whole words so passages don't start or end mid-word.
+    while start > 0 and not text[start - 1].isspace():
+        start -= 1
+    while end < len(text) and not text[end].isspace():
+        end += 1
+    return start, end
+
+
+def shrink(text, window, spans, length):
+    # Cut a window down to `length` characters centred on its first hit.
+    first = next((s, e) for s, e in spans if s >= window[0] and e <= window[1])
+    start = max(window[0], (first[0] + first[1]) // 2 - length // 2)
+    end = min(window[1], start + length)
+    start = max(window[0], end - length)
+    while start < first[0] and not text[start].isspace():
+        start += 1
+    while end > first[1] and not text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def score(window, spans_by_term):
+    start, end = window
+    terms = 0
+    hits = 0
+    for spans in spans_by_term.values():
+        inside = sum(1 for s, e in spans if s >= start and e <= end)
+        terms += 1 if inside else 0
+        hits += inside
+    # Covering more distinct keywords beats repeating one of them.
+    return terms * 10 + hits
+
+
+def select_passages(text, spans_by_term, budget_tokens=CONTEXT_TOKENS, radius=PASSAGE_RADIUS):
+    budget = budget_tokens * 4
+    spans = sorted(span for spans in spans_by_term.values() for span in spans)
+    if not spans:
+        return text[:budget]
+
+    windows = []
+    for start, end in spans:
+        window = snap(text, max(0, start - radius), min(len(text), end + radius))
+        if windows and window[0] <= windows[-1][1]:
+            previous = windows[-1]
+            if max(previous[1], window[1]) - previous[0] <= budget // 2:
+                windows[-1] = (previous[0], max(previous[1], window[1]))
+                continue
+            # Dense hits: start a new window rather than growing one without bound.
+            window = (previous[1], window[1])
+            if window[1] <= window[0]:
+                continue
+        windows.append(window)
+
+    chosen = []
+    used = 0
+    for window in sorted(windows, key=lambda w: score(w, spans_by_term), reverse=True):
+        remaining = budget - used
+        if remaining < min(radius, budget // 4):
+            break
+        if window[1] - window[0] > remaining:
+            window = shrink(text, window, spans, remaining)
+        chosen.append(window)
+        used += window[1] - window[0]
+    chosen.sort()
+    return ' … '.join(text[start:end].strip() for start, end in chosen)
+
+
+def title_query(title):
+    return ', '.join(sorted({word.lower() for word in TITLE_WORD.findall(title or '')}))
+
+
+def select_context(text, query, budget_tokens=CONTEXT_TOKENS):
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+    if not query:
+        return text[:budget_tokens * 4]
+    return select_passages(text, compile_query(query).search(text).offsets, budget_tokens)
@@ -0,0 +1,118 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+PERSIST_DELAY = float(os.getenv("ORIANA_PERSIST_DELAY", 2.0))
+PERSIST_MAX_RETRIES = int(os.getenv("ORIANA_PERSIST_MAX_RETRIES", 5))
+FLUSH_TIMEOUT = 30
+
+
+class GitHubWriter:
+    # Write-behind persistence for repository files. Writes are queued and
+    # return immediately; a background thread waits PERSIST_DELAY seconds for
+    # more writes, then commits everything pending as a single commit.
+
+    def __init__(self, get_repo, delay=PERSIST_DELAY, max_retries=PERSIST_MAX_RETRIES):
+        self.get_repo = get_repo
+        self.delay = delay
+        self.max_retries = max_retries
+        self.pending = {}
+        # Files whose commit gave up; they go out again with the next write().
+        self.failed = {}
+        self.committing = False
+        self.flushing = 0
+        self.condition = threading.Condition()
+        self.thread = None
+        # Our own last commit, so the next one needs no reads from GitHub.
+        self.ref = None
+        self.head = None
+        self.tree = None
+        atexit.register(self.flush, FLUSH_TIMEOUT)
+
+    def write(self, path, content):
+        with self.condition:
+            for failed_path, failed_content in self.failed.items():
+                self.pending.setdefault(failed_path, failed_content)
+            self.failed.clear()
+            self.pending[path] = content
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="oriana-persist", daemon=True)
+                self.thread.start()
+            self.condition.notify_all()
+
+    def flush(self, timeout=None):
+        # True once everything written has been committed; False on timeout or
+        # if the writer gave up on some files.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            self.flushing += 1
+            self.condition.notify_all()
+            try:
+                while self.pending or self.committing:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self.condition.wait(remaining)
+            finally:
+                self.flushing -= 1
+            return not self.failed
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                # Coalesce a burst of writes into one commit, unless someone is
+                # waiting on flush().
+                deadline = time.monotonic() + self.delay
+                while not self.flushing and time.monotonic() < deadline:
+                    self.condition.wait(deadline - time.monotonic())
+                files = dict(self.pending)
+                self.pending.clear()
+                self.committing = True
+            try:
+                self._commit_with_retries(files)
+            finally:
+                with self.condition:
+                    self.committing = False
+                    self.condition.notify_all()
+
+    def _commit_with_retries(self, files):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._commit(files)
+                logging.info(f"Saved {', '.join(sorted(files))} to GitHub")
+                return
+            except Exception as e:
+                # Most failures are a ref that moved under us; start from a fresh head.
+                self.ref = self.head = self.tree = None
+                logging.warning(f"Error saving {', '.join(sorted(files))} to GitHub (attempt {attempt + 1}): {str(e)}")
+                if attempt < self.max_retries:
+                    time.sleep(min(30, 2 ** attempt))
+        logging.error(f"Giving up saving {', '.join(sorted(files))} to GitHub")
+        with self.condition:
+            # Set aside until the next write rather than retrying in a loop,
+            # unless a newer version was written meanwhile.
+            for path, content in files.items():
+                if path not in self.pending:
+                    self.failed[path] = content
+
+    def _commit(self, files):
+        from github import InputGitTreeElement
+
+        repo = self.get_repo()
+        if self.ref is None:
+            self.ref = repo.get_git_ref(f"heads/{repo.default_branch}")
+            self.head = repo.get_git_commit(self.ref.object.sha)
+            self.tree = self.head.tree
+        elements = [
+            InputGitTreeElement(path, "100644", "blob", content=content)
+            for path, content in sorted(files.items())
+        ]
+        tree = repo.create_git_tree(elements, self.tree)
+        message = "Update " + ", ".join(sorted(files))
+        commit = repo.create_git_commit(message, tree, [self.head])
+        self.ref.edit(commit.sha)
+        self.head, self.tree = commit, tree
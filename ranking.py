@@ -0,0 +1,13 @@
+def rank_by_tfidf(query, texts):
+    # Cosine similarity between the query and each text in TF-IDF space;
+    # TfidfVectorizer rows are L2-normalized, so a dot product is enough.
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    if not texts:
+        return []
+    vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), sublinear_tf=True)
+    try:
+        matrix = vectorizer.fit_transform(list(texts) + [query])
+    except ValueError:
+        # Nothing but stop words in the corpus.
+        return [0.0] * len(texts)
+    return (matrix[:-1] @ matrix[-1].T).toarray().ravel().tolist()
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from keyword_matcher import compile_query
+from storage import DATA_DIR
+
+INDEX_RESULTS = int(os.getenv("ORIANA_INDEX_RESULTS", 20))
+
+# Every page Oriana reads is kept here: pages holds one row per URL and
+# pages_fts is an FTS5 index over its title and text, kept in step by triggers.
+
+
+def phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def to_fts_query(query):
+    # Translate the keyword syntax (commas, AND, NOT, NEAR/n) into FTS5's.
+    # A clause made only of NOT terms has nothing to match against and is dropped.
+    clauses = []
+    for clause in compile_query(query).clauses:
+        parts = []
+        for op, term in clause:
+            if op == 'NOT':
+                if parts:
+                    parts.append(f"NOT {phrase(term)}")
+            elif op.startswith(('NEAR', 'WITHIN')) and parts and parts[-1].startswith('"'):
+                distance = op.split('/')[1]
+                parts[-1] = f"NEAR({parts[-1]} {phrase(term)}, {distance})"
+            else:
+                parts.append(f"AND {phrase(term)}" if parts else phrase(term))
+        if parts:
+            clauses.append('(' + ' '.join(parts) + ')')
+    return ' OR '.join(clauses)
+
+
+class SearchIndex:
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DATA_DIR, "index.sqlite3")
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "id INTEGER PRIMARY KEY, url TEXT UNIQUE, title TEXT, published TEXT, "
+            "text TEXT, fingerprint TEXT, fetched_at REAL, indexed_at REAL);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5("
+            "title, text, content='pages', content_rowid='id', tokenize='porter unicode61');"
+            "CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN "
+            "INSERT INTO pages_fts (rowid, title, text) VALUES (new.id, new.title, new.text); END;"
+            "CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN "
+            "INSERT INTO pages_fts (pages_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text); END;"
+            "CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE OF title, text ON pages BEGIN "
+            "INSERT INTO pages_fts (pages_fts, rowid, title, text) VALUES ('delete', old.id, old.title, old.text); "
+            "INSERT INTO pages_fts (rowid, title, text) VALUES (new.id, new.title, new.text); END;"
+        )
+        self.conn.commit()
+
+    def add(self, url, text, title=None, published=None, fetched_at=None):
+        # Unchanged pages are skipped, so indexing on every fetch stays cheap.
+        fingerprint = hashlib.sha256(text.encode()).hexdigest()
+        published = published.isoformat() if hasattr(published, 'isoformat') else published
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fingerprint, title, published FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            if row and row[0] == fingerprint and (title or None) in (None, row[1]) and (published or None) in (None, row[2]):
+                return False
+            self.conn.execute(
+                "INSERT INTO pages (url, title, published, text, fingerprint, fetched_at, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET "
+                "title = COALESCE(excluded.title, title), published = COALESCE(excluded.published, published), "
+                "text = excluded.text, fingerprint = excluded.fingerprint, "
+                "fetched_at = excluded.fetched_at, indexed_at = excluded.indexed_at",
+                (url, title or None, published or None, text, fingerprint, fetched_at or time.time(), time.time()),
+            )
+            self.conn.commit()
+        return True
+
+    def search(self, query, limit=INDEX_RESULTS):
+        expression = to_fts_query(query)
+        if not expression:
+            return []
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT pages.url, pages.title, pages.published, pages.fetched_at, "
+                "snippet(pages_fts, 1, '**', '**', ' … ', 24), bm25(pages_fts, 5.0, 1.0) "
+                "FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid "
+                "WHERE pages_fts MATCH ? ORDER BY bm25(pages_fts, 5.0, 1.0) LIMIT ?",
+                (expression, limit),
+            ).fetchall()
+        return [
+            {
+                'url': url,
+                'title': title,
+                'published_date': published,
+                'fetched_at': fetched_at,
+                'snippet': snippet,
+                'score': -rank,
+            }
+            for url, title, published, fetched_at, snippet, rank in rows
+        ]
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM pages")
+            self.conn.commit()
@@ -0,0 +1,287 @@
+# JSON-over-HTTP access to Oriana for other tools, without Streamlit.
+#
+#   python service.py [--host 127.0.0.1] [--port 8080]
+#
+#   POST /answer      {"keywords": "...", "source": "https://...", "stream": false}
+#   POST /summarize   {"urls": [...]} or {"articles": [{"title", "url", "content", ...}]}
+#   POST /transcript  {"answers": ["source: summary", ...], "stream": false}
+#   GET  /health
+#
+# One process serves every caller from one Oriana, so the page, response,
+# duplicate and summary caches are shared across requests. The server is
+# plain asyncio: blocking Oriana calls run in worker threads, and at most
+# ORIANA_SERVICE_CONCURRENCY requests are processed at once; callers beyond
+# ORIANA_SERVICE_BACKLOG more get 503 instead of queueing without bound.
+# With "stream": true, /answer and /transcript send the text as it is
+# generated and /summarize sends one JSON line per finished summary, all
+# with chunked transfer encoding.
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+from batch import summarize_urls_async
+
+SERVICE_CONCURRENCY = int(os.getenv("ORIANA_SERVICE_CONCURRENCY", 32))
+SERVICE_BACKLOG = int(os.getenv("ORIANA_SERVICE_BACKLOG", 256))
+SERVICE_MAX_BODY = int(os.getenv("ORIANA_SERVICE_MAX_BODY", 1024 * 1024))
+SERVICE_MAX_URLS = int(os.getenv("ORIANA_SERVICE_MAX_URLS", 20))
+HEADER_TIMEOUT = 30
+DONE = object()
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+
+    def __init__(self, writer, keep_alive):
+        self.writer = writer
+        self.keep_alive = keep_alive
+        self.started = False
+
+    def head(self, status, content_type, length=None):
+        self.started = True
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}",
+                 f"Connection: {'keep-alive' if self.keep_alive else 'close'}"]
+        lines.append(f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked")
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+
+    async def json(self, value, status=HTTPStatus.OK):
+        body = json.dumps(value, ensure_ascii=False, default=str).encode()
+        self.head(status, "application/json", len(body))
+        self.writer.write(body)
+        await self.writer.drain()
+
+    async def stream(self, chunks, content_type):
+        self.head(HTTPStatus.OK, content_type)
+        async for chunk in chunks:
+            data = chunk.encode()
+            if data:
+                self.writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                await self.writer.drain()
+        self.writer.write(b"0\r\n\r\n")
+        await self.writer.drain()
+
+
+async def iterate_in_thread(iterator):
+    # Drive a blocking generator (an LLM token stream) from a worker thread.
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+
+    def pump():
+        try:
+            for item in iterator:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, f"Error: {str(e)}")
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, DONE)
+
+    threading.Thread(target=pump, daemon=True).start()
+    while (item := await queue.get()) is not DONE:
+        yield item
+
+
+def require(body, field, kind):
+    value = body.get(field)
+    if not isinstance(value, kind) or not value:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"'{field}' is required")
+    return value
+
+
+def article_fields(articles):
+    # title, url and content are required; source and published_date may be left out.
+    checked = []
+    for index, article in enumerate(articles):
+        if not isinstance(article, dict) or not all(
+            isinstance(article.get(field), str) and article[field] for field in ('title', 'url', 'content')
+        ):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"articles[{index}] needs 'title', 'url' and 'content'")
+        checked.append({'published_date': None, **article, 'source': article.get('source') or article['url']})
+    return checked
+
+
+def answer_texts(answers):
+    for index, answer in enumerate(answers):
+        if not isinstance(answer, str) or not answer.strip():
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"answers[{index}] must be a non-empty string")
+    return answers
+
+
+class OrianaService:
+
+    def __init__(self, oriana, concurrency=SERVICE_CONCURRENCY, backlog=SERVICE_BACKLOG):
+        self.oriana = oriana
+        self.slots = asyncio.Semaphore(concurrency)
+        self.capacity = concurrency + backlog
+        self.active = 0
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("POST", "/answer"): self.answer,
+            ("POST", "/summarize"): self.summarize,
+            ("POST", "/transcript"): self.transcript,
+        }
+
+    async def health(self, body, response):
+        await response.json({'status': 'ok', 'active': self.active})
+
+    async def answer(self, body, response):
+        keywords = require(body, 'keywords', str)
+        source = require(body, 'source', str)
+        if body.get('stream'):
+            answer = await asyncio.to_thread(self.oriana.answer_question, keywords, source, True)
+            await response.stream(iterate_in_thread(answer), "text/plain; charset=utf-8")
+        else:
+            answer = await asyncio.to_thread(self.oriana.answer_question, keywords, source)
+            await response.json({'source': source, 'keywords': keywords, 'answer': answer})
+
+    async def summarize(self, body, response):
+        if 'articles' in body:
+            articles = article_fields(require(body, 'articles', list)[:SERVICE_MAX_URLS])
+            summaries = await asyncio.to_thread(self.oriana.summarize_articles, articles, len(articles))
+            await response.json({'summaries': summaries})
+            return
+
+        urls = require(body, 'urls', list)[:SERVICE_MAX_URLS]
+        if not body.get('stream'):
+            summaries = await summarize_urls_async(self.oriana, urls)
+            await response.json({'summaries': summaries})
+            return
+
+        queue = asyncio.Queue()
+
+        async def lines():
+            task = asyncio.create_task(summarize_urls_async(
+                self.oriana, urls, on_summary=lambda index, summary: queue.put_nowait((index, summary))
+            ))
+            for _ in urls:
+                index, summary = await queue.get()
+                yield json.dumps({'index': index, 'url': urls[index], 'summary': summary},
+                                 ensure_ascii=False, default=str) + '\n'
+            await task
+
+        await response.stream(lines(), "application/x-ndjson")
+
+    async def transcript(self, body, response):
+        answers = answer_texts(require(body, 'answers', list))
+        if body.get('stream'):
+            transcript = await asyncio.to_thread(self.oriana.generate_news_transcript, answers, 5, True)
+            await response.stream(iterate_in_thread(transcript), "text/plain; charset=utf-8")
+        else:
+            transcript = await asyncio.to_thread(self.oriana.generate_news_transcript, answers)
+            await response.json({'transcript': transcript})
+
+    async def read_request(self, reader):
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), HEADER_TIMEOUT)
+        lines = head.decode('latin-1').split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > SERVICE_MAX_BODY:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        keep_alive = version == "HTTP/1.1" and headers.get('connection', '').lower() != "close"
+        return method, urlsplit(target).path, body, keep_alive
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    method, path, raw, keep_alive = await self.read_request(reader)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                response = Response(writer, keep_alive)
+                await self.dispatch(method, path, raw, response)
+                if not keep_alive:
+                    return
+        except HTTPError as e:
+            await Response(writer, False).json({'error': str(e)}, e.status)
+        except Exception as e:
+            logging.error(f"Error handling request: {str(e)}")
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, raw, response):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            status = HTTPStatus.METHOD_NOT_ALLOWED if any(p == path for _, p in self.routes) else HTTPStatus.NOT_FOUND
+            await response.json({'error': status.phrase}, status)
+            return
+        if self.active >= self.capacity:
+            await response.json({'error': "Too many requests in progress, try again later"},
+                                HTTPStatus.SERVICE_UNAVAILABLE)
+            return
+        try:
+            body = json.loads(raw or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            await response.json({'error': f"Invalid JSON: {str(e)}"}, HTTPStatus.BAD_REQUEST)
+            return
+
+        self.active += 1
+        try:
+            async with self.slots:
+                await handler(body, response)
+        except Exception as e:
+            if response.started:
+                # Part of a streamed body is already out; all we can do is drop the connection.
+                raise
+            if isinstance(e, HTTPError):
+                await response.json({'error': str(e)}, e.status)
+            else:
+                logging.error(f"Error in {path}: {str(e)}")
+                await response.json({'error': str(e)}, HTTPStatus.INTERNAL_SERVER_ERROR)
+        finally:
+            self.active -= 1
+
+
+async def serve(host, port, oriana=None):
+    if oriana is None:
+        from main_functions import Oriana
+        oriana = Oriana()
+    service = OrianaService(oriana)
+    # Handlers run Oriana in threads; allow one per concurrent request.
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=SERVICE_CONCURRENCY + 4))
+    server = await asyncio.start_server(service.handle, host, port)
+    logging.info(f"Oriana service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Oriana's operations as JSON over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
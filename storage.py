@@ -0,0 +1,137 @@
+import base64
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.getenv("ORIANA_DATA_DIR", ".oriana_data")
+STORAGE_BACKEND = os.getenv("ORIANA_STORAGE", "sqlite")
+GITHUB_MIRROR = os.getenv("ORIANA_GITHUB_MIRROR", "1") == "1"
+
+# Oriana keeps a handful of named JSON values ("sources", "resources", ...).
+# A store only has to load and save them by name; load returns None when the
+# name has never been saved and raises when the store can't be read, so a
+# failed read is never mistaken for an empty value.
+
+
+class StateStore(ABC):
+
+    @abstractmethod
+    def load(self, name):
+        ...
+
+    @abstractmethod
+    def save(self, name, value):
+        ...
+
+
+class SQLiteStore(StateStore):
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DATA_DIR, "state.sqlite3")
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value TEXT, updated_at REAL)"
+        )
+        self.conn.commit()
+
+    def load(self, name):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, name, value):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO state VALUES (?, ?, ?)", (name, json.dumps(value), time.time())
+            )
+            self.conn.commit()
+
+
+class FileStore(StateStore):
+    # The <name>.json files shipped with the repository.
+
+    def __init__(self, directory=ROOT, read_only=False):
+        self.directory = directory
+        self.read_only = read_only
+
+    def load(self, name):
+        try:
+            with open(os.path.join(self.directory, f"{name}.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, name, value):
+        if self.read_only:
+            return
+        with open(os.path.join(self.directory, f"{name}.json"), 'w') as f:
+            json.dump(value, f)
+
+
+class GitHubStore(StateStore):
+    # <name>.json in the GitHub repository; saves go through the write-behind
+    # GitHubWriter so they never block the caller.
+
+    def __init__(self, get_repo, writer):
+        self.get_repo = get_repo
+        self.writer = writer
+
+    def load(self, name):
+        from github import UnknownObjectException
+        try:
+            content = self.get_repo().get_contents(f"{name}.json")
+        except UnknownObjectException:
+            return None
+        return json.loads(base64.b64decode(content.content).decode())
+
+    def save(self, name, value):
+        self.writer.write(f"{name}.json", json.dumps(value))
+
+
+class MirroredStore(StateStore):
+    # Reads and writes the primary store; every save is also queued to the
+    # mirror. A name missing from the primary is seeded from the mirror once.
+
+    def __init__(self, primary, mirror):
+        self.primary = primary
+        self.mirror = mirror
+
+    def load(self, name):
+        value = self.primary.load(name)
+        if value is None:
+            # Errors propagate: an unreadable mirror is not an empty one.
+            value = self.mirror.load(name)
+            if value is not None:
+                self.primary.save(name, value)
+        return value
+
+    def save(self, name, value):
+        self.primary.save(name, value)
+        try:
+            self.mirror.save(name, value)
+        except Exception as e:
+            logging.error(f"Error mirroring {name}: {str(e)}")
+
+
+def create_store(get_repo, get_writer, backend=STORAGE_BACKEND, github_mirror=GITHUB_MIRROR):
+    if backend == "github":
+        return GitHubStore(get_repo, get_writer())
+    if backend == "file":
+        return FileStore()
+    if backend != "sqlite":
+        raise ValueError(f"Unknown storage backend: {backend}")
+    if github_mirror:
+        mirror = GitHubStore(get_repo, get_writer())
+    else:
+        # Seed from the bundled files, but never write back to them.
+        mirror = FileStore(read_only=True)
+    return MirroredStore(SQLiteStore(), mirror)
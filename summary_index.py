@@ -0,0 +1,135 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+from storage import DATA_DIR
+
+SUMMARY_DIM = int(os.getenv("ORIANA_SUMMARY_DIM", 512))
+RELATED_MIN_SCORE = float(os.getenv("ORIANA_RELATED_MIN_SCORE", 0.2))
+BLOCK_ROWS = 65536
+
+# Every summary Oriana writes is kept for "related stories". The text and
+# metadata live in SQLite; the vectors are rows of one float32 file that is
+# memory-mapped and scanned block by block, so a lookup never builds Python
+# objects for the stored summaries. Row i of the file belongs to id i + 1.
+
+
+@lru_cache(maxsize=None)
+def vectorizer(dim=SUMMARY_DIM):
+    from sklearn.feature_extraction.text import HashingVectorizer
+    return HashingVectorizer(n_features=dim, stop_words='english', ngram_range=(1, 2), norm='l2')
+
+
+def embed(text, dim=SUMMARY_DIM):
+    import numpy as np
+    return vectorizer(dim).transform([text]).toarray()[0].astype(np.float32)
+
+
+class SummaryIndex:
+
+    def __init__(self, directory=None, dim=SUMMARY_DIM):
+        self.directory = directory or os.path.join(DATA_DIR, "summaries")
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, f"vectors-{dim}.f32")
+        self.conn = sqlite3.connect(os.path.join(self.directory, "summaries.sqlite3"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "id INTEGER PRIMARY KEY, url TEXT, title TEXT, summary TEXT, digest TEXT, created_at REAL, "
+            "UNIQUE (url, digest))"
+        )
+        self.conn.commit()
+        self.matrix = None
+
+    def count(self):
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM summaries").fetchone()[0]
+
+    def add(self, url, title, summary):
+        digest = hashlib.sha256(summary.encode()).hexdigest()
+        vector = embed(summary, self.dim)
+        if not vector.any():
+            return False
+        with self.lock:
+            # The crawler and the app may add at the same time: BEGIN IMMEDIATE
+            # holds SQLite's write lock from choosing the row to the commit, so
+            # no other process can pick the same row.
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self.conn.execute(
+                    "SELECT 1 FROM summaries WHERE url = ? AND digest = ?", (url, digest)
+                ).fetchone():
+                    self.conn.rollback()
+                    return False
+                count = self.count()
+                # Write the vector first: a row left over from an interrupted add
+                # is simply overwritten by the next one.
+                with open(self.vectors_path, 'r+b' if os.path.exists(self.vectors_path) else 'wb') as f:
+                    f.seek(count * self.row_bytes)
+                    f.write(vector.tobytes())
+                self.conn.execute(
+                    "INSERT INTO summaries VALUES (?, ?, ?, ?, ?, ?)",
+                    (count + 1, url, title, summary, digest, time.time()),
+                )
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+        return True
+
+    def vectors(self, count):
+        import numpy as np
+        if self.matrix is None or len(self.matrix) != count:
+            self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(count, self.dim))
+        return self.matrix
+
+    def related(self, text, k=5, exclude_url=None, min_score=RELATED_MIN_SCORE):
+        import numpy as np
+        query = embed(text, self.dim)
+        with self.lock:
+            count = self.count()
+            if not count or not query.any():
+                return []
+            matrix = self.vectors(count)
+        # Keep a few spare candidates per block for rows that get filtered out.
+        keep = k * 4
+        best_ids = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, count, BLOCK_ROWS):
+            scores = matrix[start:start + BLOCK_ROWS] @ query
+            if len(scores) > keep:
+                top = np.argpartition(scores, -keep)[-keep:]
+            else:
+                top = np.arange(len(scores))
+            best_ids = np.concatenate([best_ids, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+        order = np.argsort(-best_scores)
+
+        results = []
+        seen = {exclude_url}
+        with self.lock:
+            for index in order:
+                score = float(best_scores[index])
+                if score < min_score or len(results) == k:
+                    break
+                row = self.conn.execute(
+                    "SELECT url, title, summary, created_at FROM summaries WHERE id = ?",
+                    (int(best_ids[index]) + 1,),
+                ).fetchone()
+                if row is None or row[0] in seen:
+                    continue
+                seen.add(row[0])
+                results.append({
+                    'url': row[0],
+                    'title': row[1],
+                    'summary': row[2],
+                    'created_at': row[3],
+                    'score': score,
+                })
+        return results